@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: ucs_perf
+callback: ucs_perf
+type: aggregate
+short_description: Sums up the Cisco UCS Manager XML API cost of a playbook run
+description:
+- Collects the C(ucs_perf) call summary returned by the ucs_ modules (and by each loop item and each domain of
+  ucs_query) for every task.
+- At the end of the run it prints the slowest UCS tasks, the round trips, logins and API time for each UCS domain and
+  for each role, and writes the same data as JSON to I(report_dir) for tracking over time.
+- Tasks that do not return C(ucs_perf) are not counted.
+requirements:
+- Enable the plugin with C(callbacks_enabled) (C(callback_whitelist) before Ansible 2.11) in ansible.cfg or the
+  C(ANSIBLE_CALLBACKS_ENABLED) environment variable.
+options:
+  top_tasks:
+    description:
+    - Number of slowest tasks to print.
+    type: int
+    default: 10
+    env:
+    - name: UCS_PERF_TOP_TASKS
+    ini:
+    - section: callback_ucs_perf
+      key: top_tasks
+  report_dir:
+    description:
+    - Directory the JSON report is written to, as C(<playbook>-<start time>.json).
+    - Set to an empty string to not write a report.
+    type: path
+    default: ~/.ansible/ucs_perf
+    env:
+    - name: UCS_PERF_REPORT_DIR
+    ini:
+    - section: callback_ucs_perf
+      key: report_dir
+'''
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+# counters summed across calls, tasks, domains and roles
+COUNTERS = ('round_trips', 'logins', 'retries', 'request_bytes', 'response_bytes')
+
+
+def find_perf(result):
+    """Yield every ucs_perf summary in a task result, including loop items and ucs_query domains."""
+    if not isinstance(result, dict):
+        return
+    if isinstance(result.get('ucs_perf'), dict):
+        yield result['ucs_perf']
+    for item in result.get('results') or []:
+        for perf in find_perf(item):
+            yield perf
+    domains = result.get('domains')
+    if isinstance(domains, dict):
+        for domain_result in domains.values():
+            for perf in find_perf(domain_result):
+                yield perf
+
+
+def new_totals(**kwargs):
+    totals = dict((counter, 0) for counter in COUNTERS)
+    totals.update(api_elapsed=0.0)
+    totals.update(kwargs)
+    return totals
+
+
+def add_perf(totals, perf):
+    for counter in COUNTERS:
+        totals[counter] += perf.get(counter, 0)
+    totals['api_elapsed'] = round(totals['api_elapsed'] + perf.get('elapsed', 0.0), 4)
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'ucs_perf'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.start = time.time()
+        self.playbook = None
+        self.task_start = {}
+        self.runner_start = {}
+        self.tasks = []
+
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self.task_start[task._uuid] = time.time()
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.task_start[task._uuid] = time.time()
+
+    def v2_runner_on_start(self, host, task):
+        self.runner_start[(host.get_name(), task._uuid)] = time.time()
+
+    def record(self, result, status):
+        task = result._task
+        host = result._host.get_name()
+        start = self.runner_start.pop((host, task._uuid), None) or self.task_start.get(task._uuid, self.start)
+        perfs = list(find_perf(result._result))
+        if not perfs:
+            return
+        role = getattr(task, '_role', None)
+        entry = new_totals(
+            task=task.get_name(),
+            action=task.action,
+            role=role.get_name() if role else None,
+            host=host,
+            status=status,
+            duration=round(time.time() - start, 3),
+            domains=sorted(set(perf.get('hostname') or host for perf in perfs)),
+        )
+        entry['perf'] = perfs
+        for perf in perfs:
+            add_perf(entry, perf)
+        self.tasks.append(entry)
+
+    def v2_runner_on_ok(self, result):
+        self.record(result, 'changed' if result._result.get('changed') else 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.record(result, 'failed')
+
+    def v2_runner_on_unreachable(self, result):
+        self.record(result, 'unreachable')
+
+    def report(self):
+        domains = {}
+        roles = {}
+        for entry in self.tasks:
+            for perf in entry['perf']:
+                # module runs, a task with a loop or several ucs_query domains has more than one
+                domain = domains.setdefault(perf.get('hostname') or entry['host'], new_totals(runs=0))
+                add_perf(domain, perf)
+                domain['runs'] += 1
+            role = roles.setdefault(entry['role'] or '', new_totals(duration=0.0, tasks=0))
+            role['tasks'] += 1
+            for counter in COUNTERS + ('api_elapsed', 'duration'):
+                role[counter] = round(role[counter] + entry[counter], 4)
+        totals = dict((key, sum(domain[key] for domain in domains.values())) for key in COUNTERS + ('runs',))
+        totals['tasks'] = len(self.tasks)
+        return dict(
+            playbook=self.playbook,
+            start=round(self.start, 3),
+            duration=round(time.time() - self.start, 3),
+            totals=totals,
+            domains=domains,
+            roles=roles,
+            tasks=[dict((key, value) for key, value in entry.items() if key != 'perf') for entry in self.tasks],
+        )
+
+    def v2_playbook_on_stats(self, stats):
+        report = self.report()
+
+        self._display.banner('UCS API COST')
+        slowest = sorted(report['tasks'], key=lambda entry: -entry['duration'])[:self.get_option('top_tasks')]
+        for entry in slowest:
+            self._display.display('%-60s %8.2fs %5d round trips %7.2fs api  %s' % (
+                ('%s : %s' % (entry['role'], entry['task']) if entry['role'] else entry['task'])[:60],
+                entry['duration'], entry['round_trips'], entry['api_elapsed'], entry['host']))
+        self._display.display('')
+        for name, domain in sorted(report['domains'].items()):
+            self._display.display('%-40s %6d round trips %4d logins %4d retries %8.2fs api %5d runs' % (
+                name, domain['round_trips'], domain['logins'], domain['retries'], domain['api_elapsed'], domain['runs']))
+        if len(report['roles']) > 1 or '' not in report['roles']:
+            self._display.display('')
+            for name, role in sorted(report['roles'].items()):
+                self._display.display('%-40s %6d round trips %8.2fs api %8.2fs wall %5d tasks' % (
+                    name or '(no role)', role['round_trips'], role['api_elapsed'], role['duration'], role['tasks']))
+
+        report_dir = self.get_option('report_dir')
+        if report_dir:
+            path = os.path.join(report_dir, '%s-%s.json' % (
+                os.path.splitext(self.playbook or 'playbook')[0], time.strftime('%Y%m%dT%H%M%S', time.localtime(self.start))))
+            try:
+                if not os.path.isdir(report_dir):
+                    os.makedirs(report_dir)
+                with open(path, 'w') as report_file:
+                    json.dump(report, report_file, indent=2, sort_keys=True)
+                self._display.display('UCS API report written to %s' % path)
+            except (IOError, OSError) as e:
+                self._display.warning('Could not write UCS API report to %s: %s' % (path, e))
@@ -16,6 +16,8 @@ module: ucs_chassis_profile_from_template
 short_description: Configures Chassis Profiles from templates on Cisco UCS Manager
 description:
 - Configures Chassis Profile created from templates on Cisco UCS Manager.
+- With I(names) or I(count), all of the chassis profiles are handled in one task. The existing chassis profiles of the
+  org are read with one children query and the changes are sent in configConfMos requests of at most 100 profiles.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -30,7 +32,23 @@ options:
     - This name can be between 2 and 32 alphanumeric characters.
     - "You cannot use spaces or any special characters other than - (hyphen), \"_\" (underscore), : (colon), and . (period)."
     - This name must be unique across all chassis profiles and chassis profile templates within the same organization.
-    required: yes
+    - One of I(name), I(names) or I(count) is required.
+  names:
+    description:
+    - List of the names of the chassis profiles to configure in one task.
+  count:
+    description:
+    - Number of chassis profiles to configure in one task, named I(name_prefix) followed by I(start_index),
+      I(start_index) + 1, and so on.
+    type: int
+  name_prefix:
+    description:
+    - Prefix of the chassis profile names with I(count), e.g. C(S3260_) for S3260_1, S3260_2, ...
+  start_index:
+    description:
+    - Number of the first chassis profile with I(count).
+    type: int
+    default: 1
   description:
     description:
     - A user-defined description of the chassis profile template.
@@ -42,6 +60,10 @@ options:
     description:
     - The name of the chassis profile template used to create this chassis profile.
     required: yes
+  org_dn:
+    description:
+    - Org dn (distinguished name)
+    default: org-root
 requirements:
 - ucsmsdk
 author:
@@ -59,6 +81,15 @@ EXAMPLES = r'''
     name: S3260_1
     source_template: S3260_Template
 
+- name: Configure Chassis Profiles S3260_1 to S3260_24 from Template
+  ucs_chassis_profile_from_template:
+    hostname: 172.16.143.150
+    username: admin
+    password: password
+    name_prefix: S3260_
+    count: 24
+    source_template: S3260_Template
+
 - name: Remove Chassis Profile
   ucs_chassis_profile_from_template:
     hostname: 172.16.143.150
@@ -69,18 +100,65 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+profiles:
+  description:
+  - Outcome for each chassis profile of I(names) or I(count), C(created), C(modified), C(deleted) or C(unchanged)
+    (or what it would be in check mode).
+  returned: with names or count
+  type: dict
+  sample: {"S3260_1": "unchanged", "S3260_2": "created"}
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, profile_names, query_profiles, ucs_argument_spec
+
+
+def update_profiles(ucs, module):
+    """Create, update or remove the chassis profiles of a names or count task and return whether anything changed."""
+    from ucsmsdk.mometa.equipment.EquipmentChassisProfile import EquipmentChassisProfile
+
+    org_dn = module.params['org_dn']
+    existing = query_profiles(ucs, org_dn, 'equipmentChassisProfile')
+    txn = UCSTransaction(ucs.login_handle)
+    profiles = {}
+    for name in profile_names(module.params):
+        props = existing.get(org_dn + '/cp-' + name)
+        if module.params['state'] == 'absent':
+            if props:
+                txn.remove_mo(EquipmentChassisProfile(parent_mo_or_dn=org_dn, name=name))
+                profiles[name] = 'deleted'
+            else:
+                profiles[name] = 'unchanged'
+        elif props and (props.get('srcTemplName'), props.get('descr'), props.get('type')) == \
+                (module.params['source_template'], module.params['description'], 'instance'):
+            profiles[name] = 'unchanged'
+        else:
+            txn.add_mo(EquipmentChassisProfile(
+                parent_mo_or_dn=org_dn,
+                name=name,
+                descr=module.params['description'],
+                src_templ_name=module.params['source_template'],
+                type='instance',
+            ), True)
+            profiles[name] = 'modified' if props else 'created'
+
+    ucs.result['profiles'] = profiles
+    changed = any(outcome != 'unchanged' for outcome in profiles.values())
+    if changed and not module.check_mode:
+        # the queued creates, updates and deletes go out in one configConfMos per 100 profiles
+        txn.commit()
+    return changed
 
 
 def main():
     argument_spec = ucs_argument_spec
     argument_spec.update(
         org_dn=dict(type='str', default='org-root'),
-        name=dict(type='str', required=True),
+        name=dict(type='str'),
+        names=dict(type='list', elements='str'),
+        count=dict(type='int'),
+        name_prefix=dict(type='str'),
+        start_index=dict(type='int', default=1),
         description=dict(type='str', default=''),
         source_template=dict(type='str', required=True),
         state=dict(type='str', default='present', choices=['present', 'absent']),
@@ -89,9 +167,26 @@ def main():
     module = AnsibleModule(
         argument_spec,
         supports_check_mode=True,
+        required_one_of=[
+            ['name', 'names', 'count'],
+        ],
+        mutually_exclusive=[
+            ['name', 'names', 'count'],
+        ],
+        required_together=[
+            ['count', 'name_prefix'],
+        ],
     )
     ucs = UCSModule(module)
 
+    if module.params['name'] is None:
+        try:
+            ucs.result['changed'] = update_profiles(ucs, module)
+        except Exception as e:
+            ucs.result['msg'] = "setup error: %s " % str(e)
+            module.fail_json(**ucs.result)
+        module.exit_json(**ucs.result)
+
     err = False
 
     # UCSModule creation above verifies ucsmsdk is present and exits on failure.  Additional imports are done below.
@@ -101,7 +196,7 @@ def main():
     try:
         mo_exists = False
         props_match = False
-        dn_base = 'org-root'
+        dn_base = module.params['org_dn']
         dn = dn_base + '/cp-' + module.params['name']
 
         mo = ucs.login_handle.query_dn(dn)
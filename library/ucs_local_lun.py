@@ -16,6 +16,8 @@ module: ucs_local_lun
 short_description: Creates and deletes local luns via storage profile on Cisco UCS Manager
 description:
 - Creates and deletes local luns via storage profile on Cisco UCS Manager.
+- The storage profile and its LUNs are read with one query, and the LUN creates, updates and deletes are sent in
+  configConfMos requests of at most 100 LUNs.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -53,6 +55,22 @@ options:
     description:
     - Choose the disk group configuration to be applied to this local LUN from the drop-down list.
     - When creating multiple LUNs, the disk policy name is appended with the suffix as used in the LUN name.
+    - If not given, no disk policy is set on the LUNs.
+
+  sp_name:
+    description:
+    - The name of the storage profile the LUNs are configured in.
+    - One of I(sp_name) or I(service_profile) is required.
+
+  service_profile:
+    description:
+    - The name of a service profile whose own (dedicated) storage profile the LUNs are configured in, instead of
+      I(sp_name).
+
+  org_dn:
+    description:
+    - Org dn (distinguished name) of the storage profile or service profile.
+    default: org-root
 
 requirements:
 - ucsmsdk
@@ -142,93 +160,119 @@ ucs_local_lun:
 '''
 
 RETURN = r'''
-#
+luns:
+  description:
+  - Action for each LUN, C(created), C(modified), C(deleted) or C(unchanged) (or what it would be in check mode).
+  returned: always
+  type: dict
+  sample: {"my_lun1": "created", "my_lun2": "unchanged"}
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
+
+
+def lun_names(params):
+    """Return (lun name, disk policy name) for each LUN of the name option.
+
+    name is either a LUN name or 'prefix, start index, count', which stands for
+    count LUNs (and disk policies) numbered from start index.
+    """
+    name_list = params['name'].split(',')
+    if len(name_list) != 3 or int(name_list[2]) <= 1:
+        return [(name_list[0], params['disk_policy_name'])]
+    start = int(name_list[1])
+    # without a disk policy name the LUNs get none, rather than policies named 1, 2, ...
+    policy = params['disk_policy_name']
+    return [(name_list[0] + str(num), policy + str(num) if policy else policy)
+            for num in range(start, start + int(name_list[2]))]
+
 
 def main():
     argument_spec = ucs_argument_spec
-    argument_spec.update(name=dict(type='str'),
+    argument_spec.update(name=dict(type='str', required=True),
                          size=dict(type='str'),
                          fractional_size=dict(type='str', default='0'),
                          auto_deploy=dict(type='str', default='auto-deploy', choices=['auto-deploy', 'no-auto-deploy']),
                          expand_to_avail=dict(type='str', default='no', choices=['yes', 'no']),
                          disk_policy_name=dict(type='str'),
                          sp_name=dict(type='str'),
-                         state=dict(type='str', default='present', choices=['present', 'absent'])) 
+                         service_profile=dict(type='str'),
+                         org_dn=dict(type='str', default='org-root'),
+                         state=dict(type='str', default='present', choices=['present', 'absent']))
 
     module = AnsibleModule(argument_spec,
-                           supports_check_mode=True)
+                           supports_check_mode=True,
+                           required_one_of=[['sp_name', 'service_profile']],
+                           mutually_exclusive=[['sp_name', 'service_profile']])
     ucs = UCSModule(module)
 
-    from ucsmsdk.mometa.lstorage.LstorageDasScsiLun import LstorageDasScsiLun 
+    from ucsmsdk.mometa.lstorage.LstorageDasScsiLun import LstorageDasScsiLun
+    from ucsmsdk.mometa.lstorage.LstorageProfileDef import LstorageProfileDef
+
+    err = False
+    changed = False
+    luns = {}
+    try:
+        if module.params['sp_name']:
+            dn_base = module.params['org_dn'] + '/profile-' + module.params['sp_name']
+        else:
+            dn_base = module.params['org_dn'] + '/ls-' + module.params['service_profile'] + '/profile-def'
+
+        # one hierarchical read gives every LUN of the storage profile
+        subtree = ucs.query_subtree(dn_base)
+        txn = UCSTransaction(ucs.login_handle)
+        profile_def = None
+        if dn_base not in subtree and module.params['service_profile'] and module.params['state'] == 'present':
+            # the dedicated storage profile is created along with its first LUNs
+            profile_def = LstorageProfileDef(parent_mo_or_dn=module.params['org_dn'] + '/ls-' + module.params['service_profile'])
+
+        for lun_name, disk_policy_name in lun_names(module.params):
+            existing_mo = subtree.get(dn_base + '/das-scsi-lun-' + lun_name)
 
-    num_luns = 1
-    name_start_index = 0
-
-    name_list = module.params['name'].split(',')
-    lun_name_prefix = name_list[0]
-    lun_name = lun_name_prefix
-    if len( name_list ) == 3:
-        name_start_index = int( name_list[1] )
-        num_luns = int( name_list[2] )
-
-    disk_policy_name_prefix = module.params['disk_policy_name'] 
-    disk_policy_name = disk_policy_name_prefix
-
-    for num in range( name_start_index, name_start_index + num_luns ):
-
-        err = False
-        changed = False
-        mo_exists = False 
-
-        if num_luns > 1:
-            lun_name = lun_name_prefix + str( num )
-            disk_policy_name = disk_policy_name_prefix + str( num )  
-
-        try: 
-            dn_base = 'org-root/profile-' + module.params['sp_name']
- 
-            mo = LstorageDasScsiLun(parent_mo_or_dn=dn_base,
-                                name=lun_name,
-                                size=module.params['size'], 
-                                fractional_size=module.params['fractional_size'],
-                                expand_to_avail=module.params['expand_to_avail'],
-                                local_disk_policy_name=disk_policy_name)
+            if module.params['state'] == 'absent':
+                if existing_mo:
+                    txn.remove_mo(existing_mo)
+                    luns[lun_name] = 'deleted'
+                else:
+                    luns[lun_name] = 'unchanged'
+                continue
 
-            dn = dn_base + '/das-scsi-lun-' + lun_name 
-            existing_mo = ucs.login_handle.query_dn(dn) 
             if existing_mo:
                 # check top-level mo props
-                kwargs = dict(size= module.params['size'])
+                kwargs = dict(size=module.params['size'])
                 kwargs['fractional_size'] = module.params['fractional_size']
                 kwargs['auto_deploy'] = module.params['auto_deploy']
                 kwargs['expand_to_avail'] = module.params['expand_to_avail']
-                kwargs['local_disk_policy_name'] = disk_policy_name 
+                kwargs['local_disk_policy_name'] = disk_policy_name
                 if existing_mo.check_prop_match(**kwargs):
-                    mo_exists = True
-
-            if module.params['state'] == 'absent':
-                if mo_exists:
-                    if not module.check_mode:
-                        # delete mo if dn already exist
-                        ucs.login_handle.remove_mo(mo)
-                        ucs.login_handle.commit()
-                    changed = True
-            else:
-                if not mo_exists:
-                    if not module.check_mode:
-                        # create mo if dn does not already exist
-                        ucs.login_handle.add_mo(mo, True)
-                        ucs.login_handle.commit()
-                    changed = True
-
-        except Exception as e:
-            err = True
-            ucs.result['msg'] = "setup error: %s " % str(e)
-
+                    luns[lun_name] = 'unchanged'
+                    continue
+
+            mo = LstorageDasScsiLun(parent_mo_or_dn=dn_base if profile_def is None else profile_def,
+                                    name=lun_name,
+                                    size=module.params['size'],
+                                    fractional_size=module.params['fractional_size'],
+                                    auto_deploy=module.params['auto_deploy'],
+                                    expand_to_avail=module.params['expand_to_avail'],
+                                    local_disk_policy_name=disk_policy_name)
+            if profile_def is None:
+                # each LUN is queued on its own and sent in one configConfMos per 100 LUNs below
+                txn.add_mo(mo, True)
+            luns[lun_name] = 'modified' if existing_mo else 'created'
+
+        if profile_def is not None and 'created' in luns.values():
+            txn.add_mo(profile_def, True)
+
+        changed = any(action != 'unchanged' for action in luns.values())
+        if changed and not module.check_mode:
+            txn.commit()
+
+    except Exception as e:
+        err = True
+        ucs.result['msg'] = "setup error: %s " % str(e)
+
+    ucs.result['luns'] = luns
     ucs.result['changed'] = changed
     if err:
         module.fail_json(**ucs.result)
@@ -91,7 +91,7 @@ RETURN = r'''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 
 def main():
@@ -118,6 +118,8 @@ def main():
     from ucsmsdk.mometa.macpool.MacpoolBlock import MacpoolBlock
 
     changed = False
+    # queue changes so they are sent in a single configConfMos request
+    txn = UCSTransaction(ucs.login_handle)
     try:
         mo_exists = False
         props_match = False
@@ -130,8 +132,7 @@ def main():
         if module.params['state'] == 'absent':
             if mo_exists:
                 if not module.check_mode:
-                    ucs.login_handle.remove_mo(mo)
-                    ucs.login_handle.commit()
+                    txn.remove_mo(mo)
                 changed = True
         else:
             if mo_exists:
@@ -167,10 +168,11 @@ def main():
                             r_from=module.params['first_addr'],
                         )
 
-                    ucs.login_handle.add_mo(mo, True)
-                    ucs.login_handle.commit()
+                    txn.add_mo(mo, True)
                 changed = True
 
+        txn.commit()
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
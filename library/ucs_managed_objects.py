@@ -16,6 +16,8 @@ module: ucs_managed_objects
 short_description: Configures Managed Objects on Cisco UCS Manager
 description:
 - Configures Managed Objects on Cisco UCS Manager.
+- The existing subtree of each object is read with one hierarchical query and compared locally with the requested
+  objects and children. Only created and changed objects are sent, in a single request for all objects.
 - The Python SDK module, Python class within the module (UCSM Class), and all properties must be directly specified.
 - More information on the UCSM Python SDK and how to directly configure Managed Objects is available at L(UCSM Python SDK,http://ucsmsdk.readthedocs.io/).
 extends_documentation_fragment: ucs
@@ -157,7 +159,14 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+changes:
+  description:
+  - Objects created, modified or deleted (or that would be in check mode), parents before children.
+  - For modified objects, properties holds the before and after value of each changed property.
+  returned: always
+  type: list
+  sample: [{"action": "modified", "class_name": "LsbootVirtualMedia", "dn": "org-root/boot-policy-Python_SDS/read-only-local-vm",
+            "properties": {"order": {"after": "2", "before": "3"}}}]
 '''
 
 import traceback
@@ -170,59 +179,85 @@ except Exception:
     IMPORT_IMP_ERR = traceback.format_exc()
     HAS_IMPORT_MODULE = False
 
-from copy import deepcopy
 import json
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 
-def traverse_objects(module, ucs, managed_object, mo=''):
-    props_match = False
+def build_objects(managed_object, parent_dn, nodes):
+    """Flatten managed_object and its children into nodes in parent first order.
 
+    Each node is (mo, properties).  Every mo is built on its own with its
+    parent's dn rather than the parent mo, so it carries no children and can
+    be committed without its subtree.
+    """
     mo_module = import_module(managed_object['module'])
-    mo_class = getattr(mo_module, managed_object['class'])
+    mo_class = getattr(mo_module, managed_object.get('class_name') or managed_object['class'])
 
-    if not managed_object['properties'].get('parent_mo_or_dn'):
-        managed_object['properties']['parent_mo_or_dn'] = mo
+    properties = dict(managed_object['properties'])
+    if not properties.get('parent_mo_or_dn'):
+        properties['parent_mo_or_dn'] = parent_dn
 
-    mo = mo_class(**managed_object['properties'])
+    mo = mo_class(**properties)
+    nodes.append((mo, properties))
 
-    existing_mo = ucs.login_handle.query_dn(mo.dn)
+    for child in managed_object.get('children') or []:
+        build_objects(child, mo.dn, nodes)
+    return nodes
 
-    if module.params['state'] == 'absent':
-        # mo must exist, but all properties do not have to match
-        if existing_mo:
-            if not module.check_mode:
-                ucs.login_handle.remove_mo(existing_mo)
-                ucs.login_handle.commit()
-            ucs.result['changed'] = True
-    else:
-        if existing_mo:
-            # check mo props
-            kwargs = dict(managed_object['properties'])
-            # remove parent info and passwords because those aren't presented in the actual props
-            kwargs.pop('parent_mo_or_dn', None)
-            kwargs.pop('pwd', None)
-            kwargs.pop('password', None)
-            if existing_mo.check_prop_match(**kwargs):
-                props_match = True
-
-        if not props_match:
-            if not module.check_mode:
-                try:
-                    ucs.login_handle.add_mo(mo, modify_present=True)
-                    ucs.login_handle.commit()
-                except Exception as e:
-                    ucs.result['err'] = True
-                    ucs.result['msg'] = "setup error: %s " % str(e)
-
-            ucs.result['changed'] = True
 
-    if managed_object.get('children'):
-        for child in managed_object['children']:
-            # explicit deep copy of child object since traverse_objects may modify parent mo information
-            copy_of_child = deepcopy(child)
-            traverse_objects(module, ucs, copy_of_child, mo)
+def diff_objects(module, nodes, existing_mos, txn):
+    """Queue the changes needed to reach nodes from existing_mos and return them."""
+    changes = []
+    if module.params['state'] == 'absent':
+        removed_dns = []
+        for mo, properties in nodes:
+            # mo must exist, but all properties do not have to match
+            existing_mo = existing_mos.get(mo.dn)
+            if not existing_mo or any(mo.dn.startswith(dn + '/') for dn in removed_dns):
+                continue
+            txn.remove_mo(existing_mo)
+            removed_dns.append(mo.dn)
+            changes.append(dict(dn=mo.dn, class_name=mo.get_class_id(), action='deleted'))
+        return changes
+
+    for mo, properties in nodes:
+        existing_mo = existing_mos.get(mo.dn)
+        if not existing_mo:
+            txn.add_mo(mo, modify_present=True)
+            changes.append(dict(dn=mo.dn, class_name=mo.get_class_id(), action='created'))
+            continue
+
+        # check mo props
+        kwargs = dict(properties)
+        # remove parent info and passwords because those aren't presented in the actual props
+        kwargs.pop('parent_mo_or_dn', None)
+        kwargs.pop('pwd', None)
+        kwargs.pop('password', None)
+        differences = {}
+        for prop, value in kwargs.items():
+            if not existing_mo.check_prop_match(**{prop: value}):
+                differences[prop] = dict(before=getattr(existing_mo, prop), after=value)
+        if differences:
+            txn.add_mo(mo, modify_present=True)
+            changes.append(dict(dn=mo.dn, class_name=mo.get_class_id(), action='modified', properties=differences))
+    return changes
+
+
+def read_existing(ucs, nodes):
+    """Return a dict of dn to existing MO for every dn in nodes.
+
+    The root's subtree is read with one hierarchical query, and nodes placed
+    outside it through an explicit parent_mo_or_dn with one more query.
+    """
+    root_dn = nodes[0][0].dn
+    existing_mos = ucs.query_subtree(root_dn)
+    outside_dns = [mo.dn for mo, properties in nodes if mo.dn != root_dn and not mo.dn.startswith(root_dn + '/')]
+    if outside_dns:
+        for dn, mo in ucs.login_handle.query_dns(outside_dns).items():
+            if mo:
+                existing_mos[dn] = mo
+    return existing_mos
 
 
 def main():
@@ -250,9 +285,22 @@ def main():
     ucs.result['err'] = False
     # note that all objects specified in the object list report a single result (including a single changed).
     ucs.result['changed'] = False
+    ucs.result['changes'] = []
+
+    # all changes for all objects are sent in a single configConfMos request
+    txn = UCSTransaction(ucs.login_handle)
+    try:
+        for managed_object in module.params['objects']:
+            nodes = build_objects(managed_object, '', [])
+            ucs.result['changes'].extend(diff_objects(module, nodes, read_existing(ucs, nodes), txn))
 
-    for managed_object in module.params['objects']:
-        traverse_objects(module, ucs, managed_object)
+        if ucs.result['changes']:
+            ucs.result['changed'] = True
+            if not module.check_mode:
+                txn.commit()
+    except Exception as e:
+        ucs.result['err'] = True
+        ucs.result['msg'] = "setup error: %s " % str(e)
 
     if ucs.result['err']:
         module.fail_json(**ucs.result)
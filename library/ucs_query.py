@@ -22,16 +22,30 @@ description:
 extends_documentation_fragment: ucs
 
 options:
+    hostname:
+        description:
+        - IP address or hostname of Cisco UCS Manager.
+        - Required unless I(domains) is given.
+        type: str
+
+    password:
+        description:
+        - Password for Cisco UCS Manager authentication.
+        - Required unless I(domains) is given, then it is the default password for each domain.
+        type: str
+
     class_ids:
         description:
         - One or more UCS Manager Class IDs to query.
         - As a comma separated list
+        - All class IDs are queried with a single configResolveClasses request.
         type: str
 
     distinguished_names:
         description:
         - One or more UCS Manager Distinguished Names to query.
         - As a comma separated list
+        - All distinguished names are queried with a single configResolveDns request.
         type: str
 
     delegate_to:
@@ -40,6 +54,50 @@ options:
         default: localhost
         type: str
 
+    output_file:
+        description:
+        - Stream the query result to this local file as JSON Lines instead of returning it in I(objects).
+        - The response is parsed incrementally and each object is written as it is read, so memory use stays flat for
+          large classes such as faultInst or eventRecord.
+        - Each line is one object with its properties and a class_id key.
+        - Not supported together with I(domains).
+        type: path
+
+    filter:
+        description:
+        - Only return objects of I(class_ids) matching this expression. The filter is applied by UCS Manager.
+        - Comparisons are written as property operator value, with operators C(==), C(!=), C(>), C(>=), C(<), C(<=)
+          and C(~) (regular expression match), and can be combined with C(and), C(or), C(not) and parentheses.
+        - Values containing spaces or parentheses must be quoted.
+        - "For example: C(oper_state == ok and model ~ '^UCSB-B200')."
+        - configResolveClasses does not take a filter, so each class ID is then queried with its own request.
+        type: str
+
+    properties:
+        description:
+        - Only return these properties of each object, by default all properties are returned.
+        - A list or a comma separated string, e.g. C(dn, model, oper_state).
+        - Properties can be given by ucsmsdk name (oper_state) or UCS Manager name (operState).
+        - The dn is always returned.
+        type: list
+        elements: str
+
+    domains:
+        description:
+        - List of UCS domains to run the same query against concurrently, instead of the single domain given by I(hostname).
+        - Each entry needs a hostname and may set username, password, port, use_ssl, use_proxy and proxy.
+          Settings an entry does not give are taken from the top level options.
+        - Each domain uses one session for all of its queries.
+        - The task fails if any domain fails, with the results of the other domains still returned.
+        type: list
+        elements: dict
+
+    max_workers:
+        description:
+        - Maximum number of domains queried at the same time when I(domains) is given.
+        default: 8
+        type: int
+
 requirements:
     - ucsmsdk
 
@@ -66,6 +124,26 @@ EXAMPLES = r'''
     class_ids: computeBlade, fabricVlan
     delegate_to: localhost
 
+- name: Stream UCS Class IDs to a file
+  ucs_query:
+    hostname: "{{ ucs_hostname }}"
+    username: "{{ ucs_username }}"
+    password: "{{ ucs_password }}"
+    class_ids: faultInst, eventRecord, storageLocalDisk
+    properties: dn, severity, descr, created, disk_state
+    output_file: /tmp/ucs_inventory.jsonl
+    delegate_to: localhost
+
+- name: Query UCS Class ID with a filter and selected properties
+  ucs_query:
+    hostname: "{{ ucs_hostname }}"
+    username: "{{ ucs_username }}"
+    password: "{{ ucs_password }}"
+    class_ids: computeBlade
+    filter: "oper_state != ok or (model ~ '^UCSB-B200' and not association == associated)"
+    properties: dn, model, oper_state, association
+    delegate_to: localhost
+
 - name: Query UCS Distinguished Name
   ucs_query:
     hostname: "{{ ucs_hostname }}"
@@ -81,37 +159,300 @@ EXAMPLES = r'''
     password: "{{ ucs_password }}"
     distinguished_names: org-root, sys/rack-unit-1, sys/chassis-1/blade-2
     delegate_to: localhost
+
+- name: Query UCS Class IDs in several domains
+  ucs_query:
+    username: "{{ ucs_username }}"
+    password: "{{ ucs_password }}"
+    domains:
+    - hostname: 10.0.1.10
+    - hostname: 10.0.2.10
+    - hostname: 10.0.3.10
+      password: "{{ ucs_lab_password }}"
+    max_workers: 16
+    class_ids: computeBlade, fabricVlan
+    delegate_to: localhost
 '''
 
 RETURN = r'''
-#
+objects:
+  description: Query results by class ID or distinguished name.
+  returned: when domains and output_file are not given
+  type: dict
+output_file:
+  description: Path of the JSON Lines file the objects were written to.
+  returned: when output_file is given
+  type: str
+counts:
+  description: Number of objects written to output_file by class ID or distinguished name.
+  returned: when output_file is given
+  type: dict
+  sample: {"faultInst": 2210, "eventRecord": 10000}
+domains:
+  description:
+  - Results by domain hostname when domains is given.
+  - Each holds objects (as above), elapsed, the seconds spent logging in and querying the domain, and the domain's
+    ucs_perf call summary, or msg if the domain failed.
+  returned: when domains is given
+  type: dict
+  sample: {"10.0.1.10": {"elapsed": 1.42, "objects": {"computeBlade": []}}}
 '''
 
+import json
+import re
+import time
+from multiprocessing.pool import ThreadPool
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
 
 
-def retrieve_class_id(class_id, ucs):
-    return ucs.login_handle.query_classid(class_id)
+FILTER_TOKEN = re.compile(
+    r'''\s*(?:(?P<paren>[()])|(?P<logic>and|or|not)\b|'''
+    r'''(?P<prop>\w+)\s*(?P<op>==|!=|>=|<=|>|<|~)\s*(?P<value>"[^"]*"|'[^']*'|[^\s()]+))'''
+)
+FILTER_TYPES = {'==': 'eq', '!=': 'ne', '>': 'gt', '>=': 'ge', '<': 'lt', '<=': 'le', '~': 're'}
+
+
+def compile_filter(filter_exp, class_id=None):
+    """Compile a filter expression into an ucsmsdk filter_str.
+
+    Comparisons are written as property operator value, for example
+    oper_state == ok, with operators ==, !=, >, >=, <, <= and ~ (regular
+    expression).  They can be combined with and, or, not and parentheses.
+    Property names may be given as XML attributes (operState) and are
+    converted to the ucsmsdk names filter_str expects when class_id is known
+    to ucsmsdk, in which case an unknown property raises ValueError.
+    """
+    from ucsmsdk.ucscoreutils import load_class
+
+    names = {}
+    mo_class = load_class(class_id) if class_id else None
+    if mo_class:
+        names = dict(mo_class.prop_map)
+
+    terms = []
+    pos = 0
+    filter_exp = filter_exp.strip()
+    while pos < len(filter_exp):
+        match = FILTER_TOKEN.match(filter_exp, pos)
+        if not match:
+            raise ValueError('invalid filter at "%s"' % filter_exp[pos:])
+        pos = match.end()
+        if match.group('prop'):
+            name = match.group('prop')
+            if mo_class and name not in names and name not in names.values():
+                raise ValueError("unknown property '%s' for class %s" % (name, class_id))
+            value = match.group('value')
+            if value[0] in '"\'':
+                value = value[1:-1]
+            quote = "'" if '"' in value else '"'
+            terms.append('(%s, %s%s%s, type="%s")' % (
+                names.get(name, name),
+                quote, value, quote,
+                FILTER_TYPES[match.group('op')],
+            ))
+        else:
+            terms.append(match.group('paren') or match.group('logic'))
+    return ' '.join(terms).replace('( ', '(').replace(' )', ')')
+
+
+def retrieve_class_ids(class_ids, ucs, filter_exp=None):
+    """Query all class_ids with one configResolveClasses request.
+
+    ucsmsdk keys the result by its own spelling of the class ID (for example
+    ComputeBlade for computeBlade), so results are returned keyed by the class
+    IDs as given.  configResolveClasses does not take a filter, so with
+    filter_exp each class is queried with its own filtered configResolveClass.
+    """
+    if filter_exp:
+        return dict(
+            (class_id, ucs.login_handle.query_classid(class_id, filter_str=compile_filter(filter_exp, class_id)))
+            for class_id in class_ids
+        )
+    mos_by_class = dict(
+        (class_id.lower(), mos) for class_id, mos in ucs.login_handle.query_classids(class_ids).items()
+    )
+    return dict((class_id, mos_by_class.get(class_id.lower(), [])) for class_id in class_ids)
 
 
-def retrieve_distinguished_name(distinguished_name, ucs):
-    return ucs.login_handle.query_dn(distinguished_name)
+def retrieve_distinguished_names(distinguished_names, ucs):
+    """Query all distinguished_names with one configResolveDns request."""
+    return ucs.login_handle.query_dns(distinguished_names)
 
 
-def make_mo_dict(ucs_mo):
+def make_mo_dict(ucs_mo, properties=None):
     obj_dict = {}
-    for mo_property in ucs_mo.prop_map.values():
-        obj_dict[mo_property] = getattr(ucs_mo, mo_property)
+    for xml_property, mo_property in ucs_mo.prop_map.items():
+        if properties is None or mo_property in properties or xml_property in properties:
+            obj_dict[mo_property] = getattr(ucs_mo, mo_property)
     return obj_dict
 
 
+def wanted_properties(params):
+    if not params['properties']:
+        return None
+    # a comma separated string is split by Ansible without stripping the spaces
+    # dn is always returned so objects can be told apart
+    return set(prop.strip() for prop in params['properties'] if prop.strip()) | set(['dn'])
+
+
+def query_objects(ucs, params):
+    query_result = {}
+    properties = wanted_properties(params)
+    if params['class_ids']:
+        class_ids = [
+            x.strip() for x in params['class_ids'].split(',')
+        ]
+        for class_id, ucs_mos in retrieve_class_ids(class_ids, ucs, params['filter']).items():
+            query_result[class_id] = []
+            for ucs_mo in ucs_mos:
+                query_result[class_id].append(make_mo_dict(ucs_mo, properties))
+
+    elif params['distinguished_names']:
+        distinguished_names = [
+            x.strip()
+            for x in params['distinguished_names'].split(',')
+        ]
+        for distinguished_name, ucs_mo in retrieve_distinguished_names(distinguished_names, ucs).items():
+            query_result[distinguished_name] = {}
+
+            if ucs_mo:
+                query_result[distinguished_name] = make_mo_dict(ucs_mo, properties)
+
+    return query_result
+
+
+def stream_objects(ucs, params):
+    """Write the query result to params['output_file'] as JSON Lines.
+
+    Property names are converted to the ucsmsdk names used by make_mo_dict
+    (admin_state for adminState) where the class is known to ucsmsdk.
+    Returns the number of objects written by class ID or distinguished name.
+    """
+    from ucsmsdk.ucsbasetype import ClassId, ClassIdSet, Dn, DnSet
+    from ucsmsdk.ucscoreutils import load_class
+    from ucsmsdk.ucsfilter import generate_infilter
+    from ucsmsdk.ucsmethodfactory import config_resolve_class, config_resolve_classes, config_resolve_dns
+
+    cookie = ucs.login_handle.cookie
+    elems = []
+    if params['class_ids']:
+        keys = [x.strip() for x in params['class_ids'].split(',')]
+        xml_class_ids = [class_id[0].lower() + class_id[1:] for class_id in keys]
+        if params['filter']:
+            for xml_class_id in xml_class_ids:
+                is_meta_class_id = load_class(xml_class_id) is not None
+                in_filter = generate_infilter(
+                    xml_class_id[0].upper() + xml_class_id[1:] if is_meta_class_id else xml_class_id,
+                    compile_filter(params['filter'], xml_class_id),
+                    is_meta_class_id,
+                )
+                elems.append(config_resolve_class(cookie=cookie, class_id=xml_class_id, in_filter=in_filter))
+        else:
+            id_set = ClassIdSet()
+            for xml_class_id in xml_class_ids:
+                class_id_obj = ClassId()
+                class_id_obj.value = xml_class_id
+                id_set.child_add(class_id_obj)
+            elems.append(config_resolve_classes(cookie=cookie, in_ids=id_set))
+        key_by_class = dict((key.lower(), key) for key in keys)
+    else:
+        keys = [x.strip() for x in params['distinguished_names'].split(',')]
+        dn_set = DnSet()
+        for distinguished_name in keys:
+            dn_obj = Dn()
+            dn_obj.value = distinguished_name
+            dn_set.child_add(dn_obj)
+        elems.append(config_resolve_dns(cookie=cookie, in_dns=dn_set))
+        key_by_class = None
+
+    wanted = wanted_properties(params)
+    # XML attribute to output property name, by class
+    names_by_class = {}
+    counts = dict((key, 0) for key in keys)
+    with open(params['output_file'], 'w') as output:
+        for class_id, props in (mo for elem in elems for mo in ucs.stream_query(elem)):
+            names = names_by_class.get(class_id)
+            if names is None:
+                mo_class = load_class(class_id)
+                names = dict(mo_class.prop_map) if mo_class else {}
+                names_by_class[class_id] = names
+            obj_dict = {}
+            for xml_name, value in props.items():
+                name = names.get(xml_name, xml_name)
+                if wanted is None or name in wanted or xml_name in wanted:
+                    obj_dict[name] = value
+            obj_dict['class_id'] = class_id
+            output.write(json.dumps(obj_dict) + '\n')
+            if key_by_class is None:
+                key = props.get('dn')
+            else:
+                key = key_by_class.get(class_id.lower(), class_id)
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def query_domain(module, domain):
+    """Log in to one domain, run the query and log out.
+
+    Runs in a worker thread, so errors are returned in the result instead of
+    failing the module.
+    """
+    params = dict(module.params)
+    params.update((key, value) for key, value in domain.items() if value is not None)
+    start = time.time()
+    domain_result = {}
+    ucs = None
+    try:
+        ucs = UCSModule(module, params)
+        domain_result['ucs_perf'] = ucs.result['ucs_perf']
+        domain_result['objects'] = query_objects(ucs, params)
+    except Exception as e:
+        domain_result['msg'] = "setup error: %s " % str(e)
+    finally:
+        if ucs is not None:
+            try:
+                ucs.logout()
+            except Exception:
+                pass
+    domain_result['elapsed'] = round(time.time() - start, 3)
+    return params['hostname'], domain_result
+
+
+def query_domains(module):
+    domains = module.params['domains']
+    pool = ThreadPool(max(1, min(module.params['max_workers'], len(domains))))
+    try:
+        results = pool.map(lambda domain: query_domain(module, domain), domains)
+    finally:
+        pool.close()
+        pool.join()
+    return dict(results)
+
+
 def main():
-    argument_spec = ucs_argument_spec
+    argument_spec = dict(ucs_argument_spec)
     argument_spec.update(
+        # a single domain, or the defaults for each entry in domains
+        hostname=dict(type='str'),
+        password=dict(type='str', no_log=True),
         class_ids=dict(type='str'),
         distinguished_names=dict(type='str'),
         delegate_to=dict(type='str', default='localhost'),
+        filter=dict(type='str'),
+        output_file=dict(type='path'),
+        properties=dict(type='list', elements='str'),
+        domains=dict(type='list', elements='dict', options=dict(
+            hostname=dict(type='str', required=True),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            port=dict(type='int'),
+            use_ssl=dict(type='bool'),
+            use_proxy=dict(type='bool'),
+            proxy=dict(type='str'),
+        )),
+        max_workers=dict(type='int', default=8),
     )
 
     module = AnsibleModule(
@@ -119,42 +460,37 @@ def main():
         supports_check_mode=False,
         mutually_exclusive=[
             ['class_ids', 'distinguished_names'],
+            ['hostname', 'domains'],
+            ['output_file', 'domains'],
+            ['filter', 'distinguished_names'],
+        ],
+        required_one_of=[
+            ['hostname', 'domains'],
         ],
     )
 
+    if module.params['domains']:
+        result = dict(changed=False, domains=query_domains(module))
+        failed = sorted(hostname for hostname, domain_result in result['domains'].items() if 'msg' in domain_result)
+        if failed:
+            module.fail_json(msg='query failed for domains: %s' % ', '.join(failed), **result)
+        module.exit_json(**result)
+
+    if not module.params['password']:
+        module.fail_json(msg='missing required arguments: password')
+
     # UCSModule verifies ucsmsdk is present and exits on failure.
     # Imports are below for UCS object creation.
     ucs = UCSModule(module)
     err = False
-    query_result = {}
 
     try:
-        if module.params['class_ids']:
-            class_ids = [
-                x.strip() for x in module.params['class_ids'].split(',')
-            ]
-            for class_id in class_ids:
-                query_result[class_id] = []
-                ucs_mos = retrieve_class_id(class_id, ucs)
-                if ucs_mos:
-                    for ucs_mo in ucs_mos:
-                        query_result[class_id].append(make_mo_dict(ucs_mo))
-
-            ucs.result['objects'] = query_result
-
-        elif module.params['distinguished_names']:
-            distinguished_names = [
-                x.strip()
-                for x in module.params['distinguished_names'].split(',')
-            ]
-            for distinguished_name in distinguished_names:
-                query_result[distinguished_name] = {}
-                ucs_mo = retrieve_distinguished_name(distinguished_name, ucs)
-
-                if ucs_mo:
-                    query_result[distinguished_name] = make_mo_dict(ucs_mo)
-
-            ucs.result['objects'] = query_result
+        query = module.params['class_ids'] or module.params['distinguished_names']
+        if query and module.params['output_file']:
+            ucs.result['counts'] = stream_objects(ucs, module.params)
+            ucs.result['output_file'] = module.params['output_file']
+        elif query:
+            ucs.result['objects'] = query_objects(ucs, module.params)
 
     except Exception as e:
         err = True
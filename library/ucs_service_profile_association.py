@@ -58,6 +58,19 @@ options:
     description:
     - The distinguished name (dn) of the organization where the resource is assigned.
     default: org-root
+  wait:
+    description:
+    - If C(yes), wait after a change until the service profile reaches its final association state.
+    - The module subscribes to the UCS Manager event channel for the service profile instead of polling.
+    - It returns when assoc_state is C(associated) (or C(unassociated) if state is absent) and fails if assoc_state is C(failed)
+      or wait_timeout expires.
+    type: bool
+    default: 'no'
+  wait_timeout:
+    description:
+    - Maximum number of seconds to wait when I(wait=yes).
+    type: int
+    default: 1800
 requirements:
 - ucsmsdk
 author:
@@ -77,7 +90,7 @@ EXAMPLES = r'''
     server_pool_name: Container-Pool
     restrict_migration: 'yes'
 
-- name: Attempt to change association once a minute for up to 10 minutes
+- name: Change association and wait up to 30 minutes for it to complete
   ucs_service_profile_association:
     hostname: 172.16.143.150
     username: admin
@@ -85,10 +98,8 @@ EXAMPLES = r'''
     service_profile_name: test-sp
     server_assignment: server
     server_dn: sys/chassis-2/blade-1
-  register: result
-  until: result.assign_state == 'assigned' and result.assoc_state == 'associated'
-  retries: 10
-  delay: 60
+    wait: yes
+    wait_timeout: 1800
 
 - name: Disassociate Service Profile
   ucs_service_profile_association:
@@ -110,12 +121,73 @@ assoc_state:
   returned: success
   type: string
   sample: associated
+elapsed:
+  description: Seconds spent waiting for the association to complete.
+  returned: when wait is yes and the association was changed
+  type: float
+  sample: 412.3
+fsm_transitions:
+  description: Service profile FSM changes seen while waiting, with the seconds since the wait started.
+  returned: when wait is yes and the association was changed
+  type: list
+  sample: [{"elapsed": 0.0, "assoc_state": "associating", "fsm_status": "AssociateBegin", "fsm_stage_descr": "", "fsm_progr": "0"}]
 '''
 
+import time
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
 
 
+def wait_for_association(ucs, module, ls_dn):
+    """Follow lsServer change events for ls_dn until the association completes.
+
+    Subscribes to the event channel before reading the current state so no
+    transition between the commit and the subscription is missed.
+    """
+    if module.params['state'] == 'absent':
+        done_state = 'unassociated'
+    else:
+        done_state = 'associated'
+    # event attribute names and the corresponding result keys
+    watched = dict(assignState='assign_state', assocState='assoc_state', fsmStatus='fsm_status',
+                   fsmStageDescr='fsm_stage_descr', fsmProgr='fsm_progr')
+
+    start = time.time()
+    events = ucs.subscribe_events(module.params['wait_timeout'])
+    ls_mo = ucs.login_handle.query_dn(ls_dn)
+    current = dict(
+        assign_state=ls_mo.assign_state,
+        assoc_state=ls_mo.assoc_state,
+        fsm_status=ls_mo.fsm_status,
+        fsm_stage_descr=ls_mo.fsm_stage_descr,
+        fsm_progr=ls_mo.fsm_progr,
+    )
+    transitions = [dict(current, elapsed=0.0)]
+    try:
+        while current['assoc_state'] not in (done_state, 'failed'):
+            class_id, props = next(events, (None, None))
+            if class_id is None:
+                break
+            if class_id != 'lsServer' or props.get('dn') != ls_dn:
+                continue
+            changes = dict((watched[prop], value) for prop, value in props.items() if prop in watched)
+            if any(current[key] != value for key, value in changes.items()):
+                current.update(changes)
+                transitions.append(dict(current, elapsed=round(time.time() - start, 1)))
+    finally:
+        events.close()
+
+    ucs.result['assign_state'] = current['assign_state']
+    ucs.result['assoc_state'] = current['assoc_state']
+    ucs.result['elapsed'] = round(time.time() - start, 1)
+    ucs.result['fsm_transitions'] = [dict((k, v) for k, v in t.items() if k != 'assign_state') for t in transitions]
+    if current['assoc_state'] == 'failed':
+        raise Exception('association failed at FSM stage %s' % current['fsm_stage_descr'])
+    if current['assoc_state'] != done_state:
+        raise Exception('timed out after %d seconds waiting for assoc_state %s' % (module.params['wait_timeout'], done_state))
+
+
 def main():
     argument_spec = ucs_argument_spec
     argument_spec.update(
@@ -126,6 +198,8 @@ def main():
         server_pool_name=dict(type='str'),
         restrict_migration=dict(type='str', default='no', choices=['yes', 'no']),
         state=dict(default='present', choices=['present', 'absent'], type='str'),
+        wait=dict(type='bool', default=False),
+        wait_timeout=dict(type='int', default=1800),
     )
     module = AnsibleModule(
         argument_spec,
@@ -238,6 +312,9 @@ def main():
                         ucs.result['assoc_state'] = ls_mo.assoc_state
                 changed = True
 
+        if changed and module.params['wait'] and not module.check_mode:
+            wait_for_association(ucs, module, ls_dn)
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
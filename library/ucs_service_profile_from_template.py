@@ -16,6 +16,9 @@ module: ucs_service_profile_from_template
 short_description: Configures Service Profiles from templates on Cisco UCS Manager
 description:
 - Configures Service Profile created from templates on Cisco UCS Manager.
+- With I(names) or I(count), all of the service profiles are handled in one task. The existing service profiles of the
+  org are read with one class query and the missing ones are created by UCS Manager from the template with one
+  lsInstantiateNNamedTemplate request.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -30,15 +33,33 @@ options:
     - This name can be between 2 and 32 alphanumeric characters.
     - "You cannot use spaces or any special characters other than - (hyphen), \"_\" (underscore), : (colon), and . (period)."
     - This name must be unique across all service profiles and service profile templates within the same organization.
-    required: yes
+    - One of I(name), I(names) or I(count) is required.
+  names:
+    description:
+    - List of the names of the service profiles to configure in one task.
+  count:
+    description:
+    - Number of service profiles to configure in one task, named I(name_prefix) followed by I(start_index),
+      I(start_index) + 1, and so on.
+    type: int
+  name_prefix:
+    description:
+    - Prefix of the service profile names with I(count), e.g. C(auto-profile-) for auto-profile-1, auto-profile-2, ...
+  start_index:
+    description:
+    - Number of the first service profile with I(count).
+    type: int
+    default: 1
   source_template:
     description:
     - The name of the service profile template used to create this serivce profile.
+    - Like UCS Manager does, the template is looked up in I(org_dn) first and then in its parent orgs.
     required: yes
   power_state:
     description:
     - The power state to be applied when this service profile is associated with a server.
     - If no value is provided, the power_state for the service profile will not be modified.
+    - Not supported with I(names) or I(count).
     choices: [up, down]
   user_label:
     description:
@@ -64,6 +85,15 @@ EXAMPLES = r'''
     name: test-sp-instance1
     source_template: test-sp
 
+- name: Configure Service Profiles auto-profile-1 to auto-profile-320 from Template
+  ucs_service_profile_from_template:
+    hostname: 172.16.143.150
+    username: admin
+    password: password
+    name_prefix: auto-profile-
+    count: 320
+    source_template: test-sp
+
 - name: Remove Service Profile
   ucs_service_profile_from_template:
     hostname: 172.16.143.150
@@ -74,18 +104,127 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+created:
+  description: DNs of the service profiles created (or that would be in check mode), with names or count.
+  returned: with names or count
+  type: list
+  sample: ["org-root/ls-auto-profile-1", "org-root/ls-auto-profile-2"]
+modified:
+  description: DNs of the existing service profiles whose template or user label was set, with names or count.
+  returned: with names or count
+  type: list
+  sample: []
+deleted:
+  description: DNs of the service profiles deleted (or that would be in check mode), with names or count.
+  returned: with names or count
+  type: list
+  sample: []
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, profile_names, query_profiles, ucs_argument_spec
+
+
+def query_template(ucs, org_dn, name):
+    """Return the dn of template name in org_dn or the nearest parent org, as UCSM resolves src_templ_name.
+
+    The candidate dns of org_dn and its parent orgs are read with one configResolveDns.
+    """
+    from ucsmsdk.ucsbasetype import DnSet, Dn
+    from ucsmsdk.ucsmethodfactory import config_resolve_dns
+
+    orgs = org_dn.split('/')
+    candidates = ['/'.join(orgs[:depth]) + '/ls-' + name for depth in range(len(orgs), 0, -1)]
+    dn_set = DnSet()
+    for candidate in candidates:
+        dn = Dn()
+        dn.value = candidate
+        dn_set.child_add(dn)
+    elem = config_resolve_dns(cookie=ucs.login_handle.cookie, in_dns=dn_set)
+    # service profiles are of type 'instance', templates are initial- or updating-template
+    templates = set(props['dn'] for class_id, props in ucs.stream_query(elem) if props.get('type') != 'instance')
+    for candidate in candidates:
+        if candidate in templates:
+            return candidate
+    return None
+
+
+def update_profiles(ucs, module):
+    """Create, update or remove the service profiles of a names or count task and return whether anything changed."""
+    from ucsmsdk.mometa.ls.LsServer import LsServer
+    from ucsmsdk.ucsbasetype import DnSet, Dn
+    from ucsmsdk.ucsmethodfactory import ls_instantiate_n_named_template
+
+    org_dn = module.params['org_dn']
+    existing = query_profiles(ucs, org_dn, 'lsServer')
+    txn = UCSTransaction(ucs.login_handle)
+    created = []
+    modified = []
+    deleted = []
+    for name in profile_names(module.params):
+        dn = org_dn + '/ls-' + name
+        props = existing.get(dn)
+        if module.params['state'] == 'absent':
+            if props:
+                txn.remove_mo(LsServer(parent_mo_or_dn=org_dn, name=name))
+                deleted.append(dn)
+        elif not props:
+            created.append(dn)
+        elif (props.get('srcTemplName'), props.get('usrLbl'), props.get('type')) != \
+                (module.params['source_template'], module.params['user_label'], 'instance'):
+            modified.append(dn)
+
+    if module.params['state'] == 'present':
+        # lsInstantiateNNamedTemplate does not set the user label, it is set along with the modified profiles
+        relabel = created if module.params['user_label'] else []
+        for dn in modified + relabel:
+            txn.add_mo(LsServer(
+                parent_mo_or_dn=org_dn,
+                name=dn[len(org_dn + '/ls-'):],
+                src_templ_name=module.params['source_template'],
+                type='instance',
+                usr_lbl=module.params['user_label'],
+            ), True)
+
+    ucs.result['created'] = created
+    ucs.result['modified'] = modified
+    ucs.result['deleted'] = deleted
+    if module.check_mode:
+        return bool(created or modified or deleted)
+
+    if created:
+        template_dn = query_template(ucs, org_dn, module.params['source_template'])
+        if template_dn is None:
+            raise ValueError("service profile template %s not found in %s or its parent orgs"
+                             % (module.params['source_template'], org_dn))
+        # UCSM creates all of the service profiles from the template in one request
+        name_set = DnSet()
+        for dn in created:
+            name = Dn()
+            name.value = dn[len(org_dn + '/ls-'):]
+            name_set.child_add(name)
+        elem = ls_instantiate_n_named_template(
+            cookie=ucs.login_handle.cookie,
+            dn=template_dn,
+            in_error_on_existing='true',
+            in_name_set=name_set,
+            in_target_org=org_dn,
+        )
+        ucs.result['created'] = [props['dn'] for class_id, props in ucs.stream_query(elem)]
+    if created and module.params['user_label'] or modified or deleted:
+        txn.commit()
+    return bool(created or modified or deleted)
 
 
 def main():
     argument_spec = ucs_argument_spec
     argument_spec.update(
         org_dn=dict(type='str', default='org-root'),
-        name=dict(type='str', required=True),
+        name=dict(type='str'),
+        names=dict(type='list', elements='str'),
+        count=dict(type='int'),
+        name_prefix=dict(type='str'),
+        start_index=dict(type='int', default=1),
         source_template=dict(type='str', required=True),
         user_label=dict(type='str', default=''),
         power_state=dict(type='str', choices=['up', 'down']),
@@ -95,9 +234,28 @@ def main():
     module = AnsibleModule(
         argument_spec,
         supports_check_mode=True,
+        required_one_of=[
+            ['name', 'names', 'count'],
+        ],
+        mutually_exclusive=[
+            ['name', 'names', 'count'],
+            ['power_state', 'names'],
+            ['power_state', 'count'],
+        ],
+        required_together=[
+            ['count', 'name_prefix'],
+        ],
     )
     ucs = UCSModule(module)
 
+    if module.params['name'] is None:
+        try:
+            ucs.result['changed'] = update_profiles(ucs, module)
+        except Exception as e:
+            ucs.result['msg'] = "setup error: %s " % str(e)
+            module.fail_json(**ucs.result)
+        module.exit_json(**ucs.result)
+
     err = False
 
     # UCSModule creation above verifies ucsmsdk is present and exits on failure.  Additional imports are done below.
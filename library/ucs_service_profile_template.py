@@ -288,11 +288,11 @@ def configure_service_profile_template(ucs, module):
     ucs.result['changed'] = True
 
 
-def check_storage_profile_props(ucs, module, dn):
+def check_storage_profile_props(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/profile-binding'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(storage_profile_name=module.params['storage_profile'])
         if mo_1.check_prop_match(**kwargs):
@@ -304,11 +304,11 @@ def check_storage_profile_props(ucs, module, dn):
     return props_match
 
 
-def check_connectivity_policy_props(ucs, module, dn):
+def check_connectivity_policy_props(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/conn-def'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(lan_conn_policy_name=module.params['lan_connectivity_policy'])
         kwargs['san_conn_policy_name'] = module.params['san_connectivity_policy']
@@ -321,11 +321,11 @@ def check_connectivity_policy_props(ucs, module, dn):
     return props_match
 
 
-def check_iqn_pool_props(ucs, module, dn):
+def check_iqn_pool_props(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/iscsi-node'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(iqn_ident_pool_name=module.params['iqn_pool'])
         if mo_1.check_prop_match(**kwargs):
@@ -337,21 +337,21 @@ def check_iqn_pool_props(ucs, module, dn):
     return props_match
 
 
-def check_inband_management_props(ucs, module, dn):
+def check_inband_management_props(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/iface-in-band'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(mode=module.params['mgmt_interface_mode'])
         if mo_1.check_prop_match(**kwargs):
             child_dn = child_dn + '/network'
-            mo_2 = ucs.login_handle.query_dn(child_dn)
+            mo_2 = mo_index.get(child_dn)
             if mo_2:
                 kwargs = dict(name=module.params['mgmt_vnet_name'])
                 if mo_2.check_prop_match(**kwargs):
                     child_dn = child_dn + '/ipv4-pooled-addr'
-                    mo_3 = ucs.login_handle.query_dn(child_dn)
+                    mo_3 = mo_index.get(child_dn)
                     if mo_3:
                         kwargs = dict(name=module.params['mgmt_inband_pool_name'])
                         if mo_3.check_prop_match(**kwargs):
@@ -363,11 +363,11 @@ def check_inband_management_props(ucs, module, dn):
     return props_match
 
 
-def check_power_props(ucs, module, dn):
+def check_power_props(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/power'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(state=module.params['power_state'])
         if mo_1.check_prop_match(**kwargs):
@@ -379,11 +379,11 @@ def check_power_props(ucs, module, dn):
     return props_match
 
 
-def check_server_pool(ucs, module, dn):
+def check_server_pool(mo_index, module, dn):
     props_match = False
 
     child_dn = dn + '/pn-req'
-    mo_1 = ucs.login_handle.query_dn(child_dn)
+    mo_1 = mo_index.get(child_dn)
     if mo_1:
         kwargs = dict(name=module.params['server_pool'])
         kwargs['qualifier'] = module.params['server_pool_qualification']
@@ -396,7 +396,7 @@ def check_server_pool(ucs, module, dn):
     return props_match
 
 
-def check_serivce_profile_templates_props(ucs, module, mo, dn):
+def check_serivce_profile_templates_props(mo_index, module, mo, dn):
     props_match = False
 
     # check top-level mo props
@@ -425,22 +425,22 @@ def check_serivce_profile_templates_props(ucs, module, mo, dn):
         # code below should discontinue checks once any mismatch is found
 
         # check storage profile 1st
-        props_match = check_storage_profile_props(ucs, module, dn)
+        props_match = check_storage_profile_props(mo_index, module, dn)
 
         if props_match:
-            props_match = check_connectivity_policy_props(ucs, module, dn)
+            props_match = check_connectivity_policy_props(mo_index, module, dn)
 
         if props_match:
-            props_match = check_iqn_pool_props(ucs, module, dn)
+            props_match = check_iqn_pool_props(mo_index, module, dn)
 
         if props_match:
-            props_match = check_inband_management_props(ucs, module, dn)
+            props_match = check_inband_management_props(mo_index, module, dn)
 
         if props_match:
-            props_match = check_power_props(ucs, module, dn)
+            props_match = check_power_props(mo_index, module, dn)
 
         if props_match:
-            props_match = check_server_pool(ucs, module, dn)
+            props_match = check_server_pool(mo_index, module, dn)
 
     return props_match
 
@@ -495,7 +495,9 @@ def main():
     # dn is <org_dn>/ls-<name>
     dn = module.params['org_dn'] + '/ls-' + module.params['name']
 
-    mo = ucs.login_handle.query_dn(dn)
+    # read the template and all of its children in one request, child checks are done against mo_index
+    mo_index = ucs.query_subtree(dn)
+    mo = mo_index.get(dn)
     if mo:
         if module.params['state'] == 'absent':
             # mo must exist but all properties do not have to match
@@ -504,7 +506,7 @@ def main():
                 ucs.login_handle.commit()
             ucs.result['changed'] = True
         else:  # state == 'present'
-            props_match = check_serivce_profile_templates_props(ucs, module, mo, dn)
+            props_match = check_serivce_profile_templates_props(mo_index, module, mo, dn)
 
     if module.params['state'] == 'present' and not props_match:
         configure_service_profile_template(ucs, module)
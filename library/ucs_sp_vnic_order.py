@@ -21,16 +21,27 @@ version_added: "2.6"
 
 description:
     - Configures Configures vNIC order for service profiles and templates on Cisco UCS Manager
+    - The vNICs and vHBAs of each service profile are read with one query, and the order changes of all service
+      profiles are sent together, in configConfMos requests of at most 100 vNICs.
 
 options:
     sp_name:
-        description: DN of the service profile
+        description:
+            - Name of the service profile
+            - One of I(sp_name) or I(sp_names) is required.
+    sp_names:
+        description:
+            - List of service profiles that get the same vNIC order, configured in one task.
     vnics:
-        description: List of vNIC order properties
+        description:
+            - List of vNIC order properties
+            - An entry without I(order) gets its position among the present entries of the list, so the list order
+              alone can give the complete order.
+            - Two present entries with the same order are rejected.
     name:
         description: Name of the vNIC
     admin_vcon:
-        description: Name of the virtual connection
+        description: Name of the virtual connection, C(any) when not set
         choices: ["1",2","3","4","any"]
     order:
         description: vNIC connection order
@@ -87,6 +98,19 @@ EXAMPLES = r'''
     hostname: 192.168.99.100
     username: admin
     password: password
+- name: Configure vnic order of several service profiles in one request
+  ucs_sp_vnic_order:
+    sp_names: "{{ range(1, 201) | map('regex_replace', '^', 'sp-') | list }}"
+    vnics:
+    - name: eth0
+      admin_vcon: '1'
+      transport: ethernet
+    - name: eth1
+      admin_vcon: '2'
+      transport: ethernet
+    hostname: 192.168.99.100
+    username: admin
+    password: password
 - name: Remove vnic order configuration from my_vnic
   ucs_sp_vnic_order:
     sp_name: my_sp
@@ -101,38 +125,52 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+vnics_changed:
+    description: Names of the vNICs and vHBAs whose order was set (or would be in check mode), by service profile.
+    returned: always
+    type: dict
+    sample: {"my_sp": ["my_vnic", "my_vhba"]}
 '''
 
 
-def get_service_profile(handle, org_dn, sp_name):
-    dn = org_dn + "/ls-" + sp_name
-    sp = handle.query_dn(dn)
-    return sp
+def query_service_profiles(ucs, sp_dns):
+    """Return the set of sp_dns that exist, read with one configResolveDns."""
+    from ucsmsdk.ucsbasetype import DnSet, Dn
+    from ucsmsdk.ucsmethodfactory import config_resolve_dns
+
+    dn_set = DnSet()
+    for sp_dn in sp_dns:
+        dn = Dn()
+        dn.value = sp_dn
+        dn_set.child_add(dn)
+    elem = config_resolve_dns(cookie=ucs.login_handle.cookie, in_dns=dn_set)
+    return set(props['dn'] for class_id, props in ucs.stream_query(elem))
+
 
+def query_vnics(ucs, sp_dn):
+    """Return a dict of dn to XML properties for the children (vNICs, vHBAs, ...) of sp_dn, read with one query."""
+    from ucsmsdk.ucsmethodfactory import config_resolve_children
 
-def update_vnic_assignment_order(ucs, vnic, sp):
+    elem = config_resolve_children(cookie=ucs.login_handle.cookie, class_id=None, in_dn=sp_dn, in_filter=None)
+    return dict((props['dn'], props) for class_id, props in ucs.stream_query(elem))
+
+
+def update_vnic_assignment_order(txn, vnic, sp_dn):
     from ucsmsdk.mometa.ls.LsVConAssign import LsVConAssign
 
-    mo = LsVConAssign(parent_mo_or_dn=sp, admin_vcon=vnic['admin_vcon'],
+    mo = LsVConAssign(parent_mo_or_dn=sp_dn, admin_vcon=vnic['admin_vcon'],
                       order=vnic['order'], transport=vnic['transport'],
                       vnic_name=vnic['name'])
-    ucs.login_handle.add_mo(mo, True)
-    ucs.login_handle.commit()
+    txn.add_mo(mo, True)
 
 
-def remove_vnic_assignment_order(ucs, vnic, sp):
+def remove_vnic_assignment_order(txn, vnic, sp_dn):
     from ucsmsdk.mometa.ls.LsVConAssign import LsVConAssign
 
-    mo = LsVConAssign(parent_mo_or_dn=sp, admin_vcon='any',
+    mo = LsVConAssign(parent_mo_or_dn=sp_dn, admin_vcon='any',
                       order='unspecified', transport=vnic['transport'],
                       vnic_name=vnic['name'])
-    ucs.login_handle.add_mo(mo, True)
-    ucs.login_handle.commit()
-
-
-def get_vnic(ucs, dn):
-    return ucs.login_handle.query_dn(dn)
+    txn.add_mo(mo, True)
 
 
 def get_vnic_dn(sp_dn, transport, name):
@@ -141,69 +179,100 @@ def get_vnic_dn(sp_dn, transport, name):
     return sp_dn + '/fc-' + name
 
 
-def matches_existing_vnic_order(vnic, vnic_mo):
+def complete_order(vnics):
+    """Return copies of vnics with state, admin_vcon and order filled in.
+
+    A present vNIC without an order gets its position among the present vNICs
+    of the list.  Two present vNICs with the same order raise ValueError.
+    """
+    completed = []
+    orders = {}
+    position = 0
+    for vnic in vnics:
+        vnic = dict(vnic)
+        if vnic.get('state') is None:
+            vnic['state'] = 'present'
+        if vnic['state'] != 'absent':
+            position += 1
+            if vnic.get('order') is None:
+                vnic['order'] = position
+            vnic['order'] = str(vnic['order'])
+            if vnic.get('admin_vcon') is None:
+                vnic['admin_vcon'] = 'any'
+            vnic['admin_vcon'] = str(vnic['admin_vcon'])
+            if vnic['order'] != 'unspecified':
+                if vnic['order'] in orders:
+                    raise ValueError("vNICs '%s' and '%s' have the same order %s"
+                                     % (orders[vnic['order']], vnic['name'], vnic['order']))
+                orders[vnic['order']] = vnic['name']
+        completed.append(vnic)
+    return completed
+
+
+def matches_existing_vnic_order(vnic, vnic_props):
     if vnic['state'] == 'absent':
-        kwargs = dict(admin_vcon='any')
-        kwargs['order'] = 'unspecified'
-    else:
-        kwargs = dict(admin_vcon=vnic['admin_vcon'])
-        kwargs['order'] = vnic['order']
-
-    if vnic['transport'] == 'ethernet':
-        kwargs['type'] = 'ether'
+        expected = ('any', 'unspecified')
     else:
-        kwargs['type'] = vnic['transport']
-    return vnic_mo.check_prop_match(**kwargs)
+        expected = (vnic['admin_vcon'], vnic['order'])
+    return (vnic_props.get('adminVcon'), vnic_props.get('order')) == expected
 
 
 def main():
     from ansible.module_utils.basic import AnsibleModule
-    from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+    from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
     argument_spec = ucs_argument_spec
     argument_spec.update(
-        sp_name=dict(required=True, type='str'),
+        sp_name=dict(type='str'),
+        sp_names=dict(type='list', elements='str'),
         vnics=dict(required=True, type='list'),
         org_dn=dict(required=False, type='str', default='org-root'),
     )
     module = AnsibleModule(argument_spec,
-                           supports_check_mode=True)
+                           supports_check_mode=True,
+                           required_one_of=[['sp_name', 'sp_names']],
+                           mutually_exclusive=[['sp_name', 'sp_names']])
     ucs = UCSModule(module)
 
     err = False
     changed = False
+    vnics_changed = {}
 
     try:
-        sp_dn = dn = module.params['org_dn'] + "/ls-" + module.params['sp_name']
-        sp = ucs.login_handle.query_dn(dn)
-        if not sp:
-            raise ValueError("SP '%s' does not exist" % sp_dn)
-
-        for vnic in module.params['vnics']:
-            vnic_mo = get_vnic(ucs, (get_vnic_dn(sp_dn, vnic['transport'], vnic['name'])))
-
-            if vnic['state'] != 'absent' and not vnic_mo:
-                raise ValueError("vNIC '%s' is not assigned to service profile '%s'" % (vnic['name'], sp_dn))
-
-            if vnic_mo:
-                if not matches_existing_vnic_order(vnic, vnic_mo):
-                    changed = True
-                    break
-
-        if changed and not module.check_mode:
-            for vnic in module.params['vnics']:
-                vnic_mo = get_vnic(ucs, (get_vnic_dn(sp_dn, vnic['transport'], vnic['name'])))
-                if vnic['state'] == 'absent' and vnic_mo:
-                    remove_vnic_assignment_order(ucs, vnic, sp)
-                elif not vnic_mo:
-
-                    update_vnic_assignment_order(ucs, vnic, sp)
-                elif not matches_existing_vnic_order(vnic, vnic_mo):
-                    update_vnic_assignment_order(ucs, vnic, sp)
+        vnics = complete_order(module.params['vnics'])
+        sp_names = module.params['sp_names'] or [module.params['sp_name']]
+        sp_dns = [module.params['org_dn'] + "/ls-" + sp_name for sp_name in sp_names]
+        existing_sps = query_service_profiles(ucs, sp_dns)
+        for sp_dn in sp_dns:
+            if sp_dn not in existing_sps:
+                raise ValueError("SP '%s' does not exist" % sp_dn)
+
+        txn = UCSTransaction(ucs.login_handle)
+        for sp_name, sp_dn in zip(sp_names, sp_dns):
+            children = query_vnics(ucs, sp_dn)
+            for vnic in vnics:
+                vnic_props = children.get(get_vnic_dn(sp_dn, vnic['transport'], vnic['name']))
+
+                if vnic['state'] != 'absent' and not vnic_props:
+                    raise ValueError("vNIC '%s' is not assigned to service profile '%s'" % (vnic['name'], sp_dn))
+
+                if vnic_props and not matches_existing_vnic_order(vnic, vnic_props):
+                    if vnic['state'] == 'absent':
+                        remove_vnic_assignment_order(txn, vnic, sp_dn)
+                    else:
+                        update_vnic_assignment_order(txn, vnic, sp_dn)
+                    vnics_changed.setdefault(sp_name, []).append(vnic['name'])
+
+        # the changes of every service profile go out in one configConfMos per 100 vNICs
+        if vnics_changed:
+            changed = True
+            if not module.check_mode:
+                txn.commit()
 
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
 
+    ucs.result['vnics_changed'] = vnics_changed
     ucs.result['changed'] = changed
     if err:
         module.fail_json(**ucs.result)
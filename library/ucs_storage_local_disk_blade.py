@@ -108,7 +108,7 @@ RETURN = r'''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 def main():
     argument_spec = ucs_argument_spec
@@ -126,9 +126,16 @@ def main():
     err = False
     changed = False
 
+    txn = UCSTransaction(ucs.login_handle)
     try:
         dn_base = 'sys'
 
+        # read all local disks with one class query and look each dn up locally instead of a query_dn per disk
+        disk_filter = '(dn, "^sys/chassis-[0-9]+/blade-", type="re")'
+        disk_mos = dict(
+            (mo.dn, mo) for mo in ucs.login_handle.query_classid('storageLocalDisk', filter_str=disk_filter)
+        )
+
         num_chassis = 1
         chassis_list = module.params['chassis_id'].split(',')
         chassis_id_start = int( chassis_list[0] )
@@ -165,17 +172,19 @@ def main():
                     for disk_num in range( disk_id_start, disk_id_start + num_disks ):
                         dn = dn_slot_base + '/disk-' + str( disk_num ) 
 
-                        existing_mo = ucs.login_handle.query_dn(dn)
+                        existing_mo = disk_mos.get(dn)
                         if existing_mo:
                             kwargs = dict(disk_state = module.params['disk_state'])
                             if not existing_mo.check_prop_match(**kwargs):
                                 if not module.check_mode:
                                     existing_mo.admin_action_trigger = "triggered"
                                     existing_mo.admin_action = module.params['disk_state']
-                                    ucs.login_handle.add_mo(existing_mo, True)
-                                    ucs.login_handle.commit()
+                                    txn.add_mo(existing_mo, True)
                                 changed = True
 
+        # all disk state changes are sent in one configConfMos request
+        txn.commit()
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
@@ -61,6 +61,20 @@ options:
     description:
     - Specify the disk state. The allowed options are unconfigured-good and jbod.
 
+  wait_for_state:
+    description:
+    - If C(yes), wait for the changed disks to report I(disk_state) before returning.
+    - Waiting reuses the module's UCS Manager session and only queries the disks that have not reached the state yet.
+    - The poll interval starts at 1 second and doubles up to 30 seconds.
+    type: bool
+    default: no
+
+  wait_timeout:
+    description:
+    - Maximum number of seconds to wait when I(wait_for_state=yes).
+    type: int
+    default: 1200
+
 requirements:
 - ucsmsdk
 author:
@@ -155,10 +169,9 @@ ucs_storage_local_disk_s_series:
 
     ---	
 
-- Using the check mode and retry options you can wait till the desired state is reached
-- For this, you need to run the task twice with the same parameters specified as shown in the example below
-- While the first one does the commit or updates the dn, the second one checks if the desired state is reached
-- You can increase the retries number based on number of chassis/ blades 
+- Use wait_for_state to wait till the desired state is reached
+- The task returns once every changed disk reports the disk state or fails after wait_timeout seconds
+- You can increase wait_timeout based on number of chassis/ blades
 
 ucs_storage_local_disk_s_series:
     hostname: "{{ucs_ip}}"
@@ -168,30 +181,50 @@ ucs_storage_local_disk_s_series:
     disk_id: 1, 56
     blade_enc: False
     disk_state: "jbod"
- 
-ucs_storage_local_disk_s_series:
-    hostname: "{{ucs_ip}}"
-    username: "{{ucs_username}}"
-    password: "{{ucs_password}}"
-    chassis_id: 1
-    disk_id: 1, 56
-    blade_enc: False
-    disk_state: "jbod"
-check_mode: yes
-register: result
-until: result.changed == False
-retries: 120
-delay: 10
+    wait_for_state: yes
+    wait_timeout: 1200
 
 
 '''
 
 RETURN = r'''
-#
+disks:
+  description:
+  - Disks waited on when I(wait_for_state=yes), with the seconds from commit until each reported I(disk_state).
+  - Disks that had not reached the state when I(wait_timeout) expired are returned with C(pending=true).
+  returned: when wait_for_state is yes and disks were changed
+  type: list
+  sample: [{"dn": "sys/chassis-1/enc-1/disk-1", "disk_state": "jbod", "elapsed": 7.2, "pending": false}]
 '''
 
+import time
+
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
+
+
+def wait_for_disk_state(ucs, module, pending_dns):
+    """Poll the pending disks until they reach disk_state or wait_timeout expires.
+
+    Each poll is a single configResolveDns for the disks still pending on the
+    module's existing session, with the interval doubling from 1 to 30 seconds.
+    Returns a list of per-disk results in the order disks reached the state.
+    """
+    start = time.time()
+    deadline = start + module.params['wait_timeout']
+    pending = set(pending_dns)
+    disks = []
+    delay = 1
+    while pending and time.time() < deadline:
+        time.sleep(min(delay, max(deadline - time.time(), 0)))
+        delay = min(delay * 2, 30)
+        for dn, mo in ucs.login_handle.query_dns(sorted(pending)).items():
+            if mo and mo.disk_state == module.params['disk_state']:
+                pending.discard(dn)
+                disks.append(dict(dn=dn, disk_state=mo.disk_state, elapsed=round(time.time() - start, 1), pending=False))
+    for dn in sorted(pending):
+        disks.append(dict(dn=dn, disk_state=None, elapsed=round(time.time() - start, 1), pending=True))
+    return disks
 
 def main():
     argument_spec = ucs_argument_spec
@@ -200,7 +233,9 @@ def main():
                          enc_id=dict(type='str', choices=['3', '4', '3, 2']),
                          disk_id=dict(type='str', required=True), 
                          blade_enc=dict(type='str', required=True, choices=['True', 'False']),
-                         disk_state=dict(type='str', required=True, choices=['jbod', 'unconfigured-good']))
+                         disk_state=dict(type='str', required=True, choices=['jbod', 'unconfigured-good']),
+                         wait_for_state=dict(type='bool', default=False),
+                         wait_timeout=dict(type='int', default=1200))
 
     module = AnsibleModule(argument_spec,
                            supports_check_mode=True,
@@ -214,9 +249,17 @@ def main():
     err = False
     changed = False
 
+    txn = UCSTransaction(ucs.login_handle)
+    changed_dns = []
     try:
         dn_base = 'sys'
 
+        # read all local disks with one class query and look each dn up locally instead of a query_dn per disk
+        disk_filter = '(dn, "^sys/chassis-", type="re")'
+        disk_mos = dict(
+            (mo.dn, mo) for mo in ucs.login_handle.query_classid('storageLocalDisk', filter_str=disk_filter)
+        )
+
         num_chassis = 1
         chassis_list = module.params['chassis_id'].split(',')
         chassis_id_start = int( chassis_list[0] )
@@ -255,15 +298,15 @@ def main():
                         for disk_num in range( disk_id_start, disk_id_start + num_disks ):
                             dn = dn_enc_base + '/disk-' + str( disk_num ) 
 
-                            existing_mo = ucs.login_handle.query_dn(dn)
+                            existing_mo = disk_mos.get(dn)
                             if existing_mo:
                                 kwargs = dict(disk_state = module.params['disk_state'])
                                 if not existing_mo.check_prop_match(**kwargs):
                                     if not module.check_mode:
                                         existing_mo.admin_action_trigger = "triggered"
                                         existing_mo.admin_action = module.params['disk_state']
-                                        ucs.login_handle.add_mo(existing_mo, True)
-                                        ucs.login_handle.commit()
+                                        txn.add_mo(existing_mo, True)
+                                        changed_dns.append(dn)
                                     changed = True
         else:
             for chassis_num in range( chassis_id_start, chassis_id_start + num_chassis ):
@@ -272,17 +315,25 @@ def main():
                 for disk_num in range( disk_id_start, disk_id_start + num_disks ):
                     dn = dn_chassis_base + '/enc-1/disk-' + str( disk_num )
 
-                    existing_mo = ucs.login_handle.query_dn(dn)
+                    existing_mo = disk_mos.get(dn)
                     if existing_mo:
                         kwargs = dict(disk_state = module.params['disk_state'])
                         if not existing_mo.check_prop_match(**kwargs):
                             if not module.check_mode:
                                 existing_mo.admin_action_trigger = "triggered"
                                 existing_mo.admin_action = module.params['disk_state']
-                                ucs.login_handle.add_mo(existing_mo, True)
-                                ucs.login_handle.commit()
+                                txn.add_mo(existing_mo, True)
+                                changed_dns.append(dn)
                             changed = True
 
+        # all disk state changes are sent in one configConfMos request
+        txn.commit()
+
+        if module.params['wait_for_state'] and changed_dns:
+            ucs.result['disks'] = wait_for_disk_state(ucs, module, changed_dns)
+            if any(disk['pending'] for disk in ucs.result['disks']):
+                raise Exception('timed out after %d seconds waiting for disk_state %s' % (module.params['wait_timeout'], module.params['disk_state']))
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
@@ -97,7 +97,7 @@ RETURN = r'''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 
 def main():
@@ -125,6 +125,8 @@ def main():
     from ucsmsdk.mometa.uuidpool.UuidpoolBlock import UuidpoolBlock
 
     ucs.result['changed'] = False
+    # queue changes so they are sent in a single configConfMos request
+    txn = UCSTransaction(ucs.login_handle)
     try:
         mo_exists = False
         props_match = False
@@ -137,8 +139,7 @@ def main():
         if module.params['state'] == 'absent':
             if mo_exists:
                 if not module.check_mode:
-                    ucs.login_handle.remove_mo(mo)
-                    ucs.login_handle.commit()
+                    txn.remove_mo(mo)
                 ucs.result['changed'] = True
         else:
             if mo_exists:
@@ -179,10 +180,11 @@ def main():
                             r_from=module.params['first_uuid'],
                         )
 
-                    ucs.login_handle.add_mo(mo, True)
-                    ucs.login_handle.commit()
+                    txn.add_mo(mo, True)
                 ucs.result['changed'] = True
 
+        txn.commit()
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
@@ -16,13 +16,35 @@ module: ucs_vlan_find
 short_description: Find VLANs on Cisco UCS Manager
 description:
 - Find VLANs on Cisco UCS Manager based on different criteria.
+- The VLAN table is read with one class query and all patterns and IDs are looked up locally, so one task can resolve
+  any number of names or IDs.
 extends_documentation_fragment: ucs
 options:
   pattern:
     description:
     - Regex pattern to find within the name property of the fabricVlan class.
-    - This is required if C(vlanid) parameter is not supplied.
+    - One of C(pattern), C(patterns), C(vlanid) or C(vlanids) is required.
     type: str
+  patterns:
+    description:
+    - List of regex patterns to find within the VLAN names, as for C(pattern).
+    - Patterns of the form C(^name$) and C(^prefix) are looked up in a name index instead of being matched against
+      every VLAN name.
+    type: list
+  cache_ttl:
+    description:
+    - Number of seconds the VLAN table of the domain is kept in I(cache_path) and used by later tasks instead of
+      querying UCS Manager.
+    - A task that uses the cached table does not log in to UCS Manager, so VLANs created or deleted in the meantime
+      are not seen.
+    - C(0) does not use the cache.
+    type: int
+    default: 0
+  cache_path:
+    description:
+    - File used to store the VLAN tables when I(cache_ttl) is set.
+    type: path
+    default: ~/.ansible/ucs_vlan_cache.json
   fabric:
     description:
     - "The fabric configuration of the VLAN.  This can be one of the following:"
@@ -36,8 +58,13 @@ options:
     description:
     - The unique string identifier assigned to the VLAN.
     - A VLAN ID can be between '1' and '3967', or between '4048' and '4093'.
-    - This is required if C(pattern) parameter is not supplied.
+    - This is a regex pattern matched within the VLAN IDs, so C(15) also finds VLANs 115 and 150. Use C(^15$) or
+      I(vlanids) for an exact match.
     type: str
+  vlanids:
+    description:
+    - List of exact VLAN IDs and ID ranges to find, e.g. C(100-199,300).
+    type: list
 requirements:
 - ucsmsdk
 author:
@@ -60,6 +87,19 @@ EXAMPLES = r'''
     username: admin
     password: password
     vlanid: '15'
+- name: Resolve several names and ID ranges in one task
+  ucs_vlan_find:
+    hostname: 172.16.143.150
+    username: admin
+    password: password
+    patterns:
+    - '^prod-'
+    - '^backup$'
+    vlanids:
+    - '100-110'
+    - '300'
+    cache_ttl: 300
+  register: found
 '''
 
 RETURN = r'''
@@ -73,11 +113,81 @@ vlan_list:
             "name": "vlcloud1"
         }
     ]
+vlan_matches:
+    description: names of the vlans found for each pattern and VLAN ID entry
+    returned: on success
+    type: dict
+    sample: {
+        "^prod-": ["prod-web", "prod-db"],
+        "100-110": ["vlan100"]
+    }
+cached:
+    description: whether the VLAN table was read from I(cache_path), in which case no ucs_perf summary is returned
+    returned: on success
+    type: bool
 '''
 
 
+import bisect
+import re
+
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSFileCache, UCSModule, parse_vlan_ids, ucs_argument_spec
+
+# patterns that only need the name index: ^name$ and ^prefix without other regex characters
+NAME_RE = re.compile(r'^\^([\w:-]+)\$$')
+PREFIX_RE = re.compile(r'^\^([\w:-]+)$')
+
+
+def query_vlan_table(ucs):
+    """Return name, id and switch_id of every LAN cloud VLAN, read with one class query."""
+    from ucsmsdk.ucsfilter import generate_infilter
+    from ucsmsdk.ucsmethodfactory import config_resolve_class
+
+    in_filter = generate_infilter('FabricVlan', '(dn, "^fabric/lan/", type="re")', True)
+    elem = config_resolve_class(cookie=ucs.login_handle.cookie, class_id='fabricVlan', in_filter=in_filter)
+    return [dict(name=props.get('name'), id=props.get('id'), switch_id=props.get('switchId'))
+            for class_id, props in ucs.stream_query(elem)]
+
+
+class VlanIndex():
+    """Name and ID lookups over a VLAN table.
+
+    find_* return the positions of the matching VLANs in the table, so
+    results can be merged and reported in table order.
+    """
+
+    def __init__(self, vlans):
+        self.vlans = vlans
+        self.by_id = {}
+        self.by_name = {}
+        for pos, vlan in enumerate(vlans):
+            self.by_id.setdefault(vlan['id'], []).append(pos)
+            self.by_name.setdefault(vlan['name'], []).append(pos)
+        self.names = sorted(self.by_name)
+
+    def find_ids(self, ids):
+        return [pos for vlan_id in parse_vlan_ids(ids) for pos in self.by_id.get(vlan_id, [])]
+
+    def find_id_pattern(self, pattern):
+        regex = re.compile(pattern)
+        return [pos for pos, vlan in enumerate(self.vlans) if regex.search(vlan['id'])]
+
+    def find_pattern(self, pattern):
+        match = NAME_RE.match(pattern)
+        if match:
+            return list(self.by_name.get(match.group(1), []))
+        match = PREFIX_RE.match(pattern)
+        if match:
+            prefix = match.group(1)
+            found = []
+            for name in self.names[bisect.bisect_left(self.names, prefix):]:
+                if not name.startswith(prefix):
+                    break
+                found.extend(self.by_name[name])
+            return found
+        regex = re.compile(pattern)
+        return [pos for pos, vlan in enumerate(self.vlans) if regex.search(vlan['name'])]
 
 
 def main():
@@ -85,36 +195,63 @@ def main():
     argument_spec.update(
         fabric=dict(type='str', default='common', choices=['common', 'A', 'B']),
         pattern=dict(type='str'),
-        vlanid=dict(type='str')
+        patterns=dict(type='list', elements='str'),
+        vlanid=dict(type='str'),
+        vlanids=dict(type='list', elements='str'),
+        cache_ttl=dict(type='int', default=0),
+        cache_path=dict(type='path', default='~/.ansible/ucs_vlan_cache.json'),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
         supports_check_mode=True,
-        required_one_of=[['pattern', 'vlanid']]
+        required_one_of=[['pattern', 'patterns', 'vlanid', 'vlanids']]
     )
 
-    ucs = UCSModule(module)
+    patterns = ([module.params['pattern']] if module.params['pattern'] else []) + (module.params['patterns'] or [])
+    id_patterns = [module.params['vlanid']] if module.params['vlanid'] else []
+    vlanids = module.params['vlanids'] or []
 
-    filtls = ['(cloud,"ethlan")']
-    if module.params['fabric'] != 'common':
-        filtls.append('(switch_id,"' + module.params['fabric'] + '")')
-    if module.params['vlanid']:
-        filtls.append('(id,"' + module.params['vlanid'] + '")')
-    else:
-        filtls.append('(name,"' + module.params['pattern'] + '")')
+    # the table of the whole LAN cloud is cached, so tasks for either fabric share it
+    cache = None
+    table = None
+    result = dict(changed=False, cached=False)
+    if module.params['cache_ttl'] > 0:
+        cache = UCSFileCache(module.params['cache_path'], module.params['cache_ttl'])
+        cache_key = '%s|%s|%s' % (module.params['hostname'], module.params['port'] or '', module.params['username'])
+        table = cache.get(cache_key)
+        # no call is made for a cached table, so there is no ucs_perf summary
+        result['cached'] = table is not None
 
-    object_dict = ucs.login_handle.query_classid("fabricVlan", filter_str=' and '.join(filtls))
+    if table is None:
+        ucs = UCSModule(module)
+        try:
+            table = query_vlan_table(ucs)
+        except Exception as e:
+            ucs.result['msg'] = "Failed to query vlan objects: %s" % str(e)
+            module.fail_json(**ucs.result)
+        if cache:
+            cache.put(cache_key, table)
+        result.update(ucs.result)
 
-    if object_dict is None:
-        module.fail_json(msg="Failed to query vlan objects")
+    if module.params['fabric'] != 'common':
+        table = [vlan for vlan in table if vlan['switch_id'] == module.params['fabric']]
+    index = VlanIndex(table)
 
-    vlnlist = []
-    for ob in object_dict:
-        vlnlist.append(dict(name=ob.name, id=ob.id))
+    found = set()
+    result['vlan_matches'] = {}
+    try:
+        for key, positions in [(pattern, index.find_pattern(pattern)) for pattern in patterns] + \
+                [(pattern, index.find_id_pattern(pattern)) for pattern in id_patterns] + \
+                [(ids, index.find_ids(ids)) for ids in vlanids]:
+            found.update(positions)
+            result['vlan_matches'][key] = [table[pos]['name'] for pos in positions]
+    except (ValueError, re.error) as e:
+        result['msg'] = str(e)
+        module.fail_json(**result)
 
-    module.exit_json(changed=False,
-                     vlan_list=vlnlist)
+    result['vlan_list'] = [dict(name=table[pos]['name'], id=table[pos]['id']) for pos in sorted(found)]
+    module.exit_json(**result)
 
 
 if __name__ == '__main__':
@@ -16,6 +16,8 @@ module: ucs_vlan_to_group
 short_description: Add VLANs to a VLAN Group. Requires VLAN and VLAN Group to already be created on UCS prior to running module.
 description:
 - Add VLANs to VLAN Groups on Cisco UCS Manager.
+- With I(vlans), the VLAN Group and its members are read with one hierarchical query, the VLANs are checked with one
+  class query, and only the VLANs to add or remove are sent, in one configConfMos request per 100 VLANs.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -30,7 +32,13 @@ options:
     - The VLAN name is case sensitive.
     - This name can be between 1 and 32 alphanumeric characters.
     - "You cannot use spaces or any special characters other than - (hyphen), \"_\" (underscore), : (colon), and . (period)."
-    required: yes
+    - Either I(vlanname) or I(vlans) is required.
+  vlans:
+    description:
+    - List of VLAN names to add to (or remove from) the VLAN Group in one task.
+    - VLAN Group members that are not listed are left as they are.
+    - With C(state=present), every listed VLAN must exist. With C(state=absent), VLANs that are not members are ignored.
+    type: list
   vlangroup:
     description:
     - The name assigned to the VLAN Group.
@@ -62,33 +70,118 @@ EXAMPLES = r'''
     vlangroup: VLANGROUP
     vlanname: VLANNAME
     state: absent
+- name: Configure several VLANs in one commit
+  ucs_vlan_to_group:
+    hostname: 1.1.1.1
+    username: admin
+    password: password
+    vlangroup: VLANGROUP
+    vlans:
+    - vlan100
+    - vlan101
+    - vlan102
 '''
 
 RETURN = r'''
-#
+added:
+  description: VLANs added to the VLAN Group (or that would be in check mode), with I(vlans).
+  returned: with vlans
+  type: list
+  sample: ["vlan100", "vlan101"]
+removed:
+  description: VLANs removed from the VLAN Group (or that would be in check mode), with I(vlans).
+  returned: with vlans
+  type: list
+  sample: []
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
+
+
+def query_vlan_names(ucs):
+    """Return the names of the common LAN cloud VLANs, read with one class query."""
+    from ucsmsdk.ucsfilter import generate_infilter
+    from ucsmsdk.ucsmethodfactory import config_resolve_class
+
+    in_filter = generate_infilter('FabricVlan', '(dn, "^fabric/lan/net-", type="re")', True)
+    elem = config_resolve_class(cookie=ucs.login_handle.cookie, class_id='fabricVlan', in_filter=in_filter)
+    return set(props['name'] for class_id, props in ucs.stream_query(elem))
+
+
+def update_vlan_list(ucs, module):
+    """Add or remove the vlans list members of the VLAN Group and return whether anything changed."""
+    from ucsmsdk.mometa.fabric.FabricPooledVlan import FabricPooledVlan
+
+    dngroup = 'fabric/lan/net-group-' + module.params['vlangroup']
+    subtree = ucs.query_subtree(dngroup)
+    if dngroup not in subtree:
+        ucs.result['msg'] = module.params['vlangroup'] + " VLAN Group not configured in UCS"
+        module.fail_json(**ucs.result)
+    members = set(mo.name for mo in subtree.values() if mo.get_class_id() == 'FabricPooledVlan')
+    txn = UCSTransaction(ucs.login_handle)
+
+    # keep the order of the vlans list and drop duplicates
+    vlans = []
+    for name in module.params['vlans']:
+        if name not in vlans:
+            vlans.append(name)
+
+    if module.params['state'] == 'present':
+        missing = [name for name in vlans if name not in members]
+        if missing:
+            vlan_names = query_vlan_names(ucs)
+            unknown = [name for name in missing if name not in vlan_names]
+            if unknown:
+                ucs.result['msg'] = "VLANs not configured in UCS: %s. Use ucs_vlans module to create the VLANs first" % ', '.join(unknown)
+                module.fail_json(**ucs.result)
+            # members are queued on their own rather than as children of the group, so commit does not re-read them
+            for name in missing:
+                txn.add_mo(FabricPooledVlan(parent_mo_or_dn=dngroup, name=name))
+        ucs.result['added'] = missing
+        ucs.result['removed'] = []
+    else:
+        extra = [name for name in vlans if name in members]
+        for name in extra:
+            txn.remove_mo(FabricPooledVlan(parent_mo_or_dn=dngroup, name=name))
+        ucs.result['added'] = []
+        ucs.result['removed'] = extra
+
+    changed = bool(ucs.result['added'] or ucs.result['removed'])
+    if changed and not module.check_mode:
+        txn.commit()
+    return changed
 
 
 def main():
     argument_spec = ucs_argument_spec
     argument_spec.update(
         vlangroup=dict(type='str', required=True),
-        vlanname=dict(type='str', required=True),
+        vlanname=dict(type='str'),
+        vlans=dict(type='list', elements='str'),
         state=dict(default='present', choices=['present', 'absent'], type='str'),
     )
 
     module = AnsibleModule(
         argument_spec,
         supports_check_mode=True,
-        required_if=[
-            ['state', 'present', ['vlangroup', 'vlanname']],
+        required_one_of=[
+            ['vlanname', 'vlans'],
+        ],
+        mutually_exclusive=[
+            ['vlanname', 'vlans'],
         ],
     )
     ucs = UCSModule(module)
 
+    if module.params['vlans'] is not None:
+        try:
+            ucs.result['changed'] = update_vlan_list(ucs, module)
+        except Exception as e:
+            ucs.result['msg'] = "setup error: %s " % str(e)
+            module.fail_json(**ucs.result)
+        module.exit_json(**ucs.result)
+
     err = False
 
     from ucsmsdk.mometa.fabric.FabricNetGroup import FabricNetGroup
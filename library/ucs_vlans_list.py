@@ -12,10 +12,13 @@ ANSIBLE_METADATA = {'metadata_version': '1.1',
 
 DOCUMENTATION = r'''
 ---
-module: ucs_vlans
+module: ucs_vlans_list
 short_description: Configures VLANs on Cisco UCS Manager
 description:
 - Configures VLANs on Cisco UCS Manager.
+- The existing LAN cloud VLANs are read with one class query and compared locally with I(vlans_list), so the number of
+  requests does not grow with the number of VLANs.  Changes are sent in configConfMos requests of at most
+  I(chunk_size) VLANs.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -27,6 +30,8 @@ options:
   vlans_list:
     description:
     - List of VLANs to configure.
+    - An entry with I(name_prefix) instead of I(name) stands for one VLAN per ID in I(id), named I(name_prefix)
+      followed by the ID.
     suboptions:
       name:
         description:
@@ -35,7 +40,11 @@ options:
         - This name can be between 1 and 32 alphanumeric characters.
         - "You cannot use spaces or any special characters other than - (hyphen), \"_\" (underscore), : (colon), and . (period)."
         - You cannot change this name after the VLAN is created.
-        required: yes
+        - Either I(name) or I(name_prefix) is required.
+      name_prefix:
+        description:
+        - Prefix of the names of a range of VLANs, e.g. C(vlan) with I(id) C(100-1999) for vlan100 to vlan1999.
+        - I(id) is then a comma separated list of IDs and ID ranges, e.g. C(100-199,300).
       multicast_policy:
         description:
         - The multicast policy associated with this VLAN.
@@ -57,7 +66,7 @@ options:
         - You cannot create VLANs with IDs from 4030 to 4047. This range of VLAN IDs is reserved.
         - The VLAN IDs you specify must also be supported on the switch that you are using.
         - VLANs in the LAN cloud and FCoE VLANs in the SAN cloud must have different IDs.
-        - Optional if state is absent.
+        - Optional if state is absent, unless I(name_prefix) is used.
         required: yes
       sharing:
         description:
@@ -74,6 +83,13 @@ options:
         - Designates the VLAN as a native VLAN.
         choices: ['yes', 'no']
         default: 'no'
+  chunk_size:
+    description:
+    - Maximum number of VLANs sent in one configConfMos request.
+    - UCS Manager applies each request as a whole. If a request fails, the VLANs of the earlier requests stay
+      configured.
+    type: int
+    default: 100
 requirements:
 - ucsmsdk
 author:
@@ -105,6 +121,15 @@ EXAMPLES = r'''
     - name: vlan1005
       id: '1005'
 
+- name: Create vlan100 to vlan1999 and vlan2100
+  ucs_vlans_list:
+    hostname: 172.16.143.150
+    username: admin
+    password: password
+    vlans_list:
+    - name_prefix: vlan
+      id: 100-1999,2100
+
 - name: Remove VLANs using a list
   ucs_vlans_list:
     hostname: 172.16.143.150
@@ -122,16 +147,106 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+created:
+  description: Names of the VLANs created (or that would be in check mode).
+  returned: always
+  type: list
+  sample: ["vlan100", "vlan101"]
+modified:
+  description: Names of the existing VLANs whose properties were changed (or would be in check mode).
+  returned: always
+  type: list
+  sample: ["vlan2"]
+deleted:
+  description: Names of the VLANs deleted (or that would be in check mode).
+  returned: always
+  type: list
+  sample: []
+requests:
+  description: Number of configConfMos requests used to commit the changes.
+  returned: always
+  type: int
+  sample: 1
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, parse_vlan_ids, ucs_argument_spec
+
+
+def expand_vlans(vlans_list):
+    """Yield (dn_base, name, id, vlan) for each VLAN, expanding name_prefix entries as they are read."""
+    for vlan in vlans_list:
+        # dn is fabric/lan/net-<name> for common vlans or fabric/lan/[A or B]/net-<name> for A or B
+        dn_base = 'fabric/lan'
+        if vlan['fabric'] != 'common':
+            dn_base += '/' + vlan['fabric']
+        if vlan['name_prefix'] is None:
+            yield dn_base, vlan['name'], vlan['id'], vlan
+            continue
+        for vlan_id in parse_vlan_ids(vlan['id']):
+            yield dn_base, vlan['name_prefix'] + vlan_id, vlan_id, vlan
+
+
+def query_vlans(ucs):
+    """Return a dict of dn to XML properties for every VLAN in the LAN cloud, read with one class query.
+
+    The response is parsed as it streams in and no SDK object is built per
+    VLAN, which would take longer than the query itself for a few thousand.
+    """
+    from ucsmsdk.ucsfilter import generate_infilter
+    from ucsmsdk.ucsmethodfactory import config_resolve_class
+
+    in_filter = generate_infilter('FabricVlan', '(dn, "^fabric/lan/", type="re")', True)
+    elem = config_resolve_class(cookie=ucs.login_handle.cookie, class_id='fabricVlan', in_filter=in_filter)
+    return dict((props['dn'], props) for class_id, props in ucs.stream_query(elem))
+
+
+def diff_vlans(module, existing_vlans, txn):
+    """Queue the changes from existing_vlans to vlans_list and return the changed VLAN names by action."""
+    from ucsmsdk.mometa.fabric.FabricVlan import FabricVlan
+
+    changes = dict(created=[], modified=[], deleted=[])
+    seen = set()
+    for dn_base, name, vlan_id, vlan in expand_vlans(module.params['vlans_list']):
+        dn = dn_base + '/net-' + name
+        if dn in seen:
+            continue
+        seen.add(dn)
+        props = existing_vlans.get(dn)
+
+        if module.params['state'] == 'absent':
+            # mo must exist but all properties do not have to match
+            if props:
+                txn.remove_mo(FabricVlan(parent_mo_or_dn=dn_base, name=name))
+                changes['deleted'].append(name)
+            continue
+
+        if props:
+            # check top-level mo props, by their XML names
+            kwargs = dict(id=vlan_id)
+            kwargs['defaultNet'] = vlan['native']
+            kwargs['sharing'] = vlan['sharing']
+            kwargs['mcastPolicyName'] = vlan['multicast_policy']
+            if all(props.get(prop) == value for prop, value in kwargs.items()):
+                continue
+
+        # create if mo does not already exist
+        txn.add_mo(FabricVlan(
+            parent_mo_or_dn=dn_base,
+            name=name,
+            id=vlan_id,
+            default_net=vlan['native'],
+            sharing=vlan['sharing'],
+            mcast_policy_name=vlan['multicast_policy'],
+        ), True)
+        changes['modified' if props else 'created'].append(name)
+    return changes
 
 
 def main():
     vlan = dict(
-        name=dict(type='str', required=True),
+        name=dict(type='str'),
+        name_prefix=dict(type='str'),
         multicast_policy=dict(type='str', default=''),
         fabric=dict(type='str', default='common', choices=['common', 'A', 'B']),
         id=dict(type='str'),
@@ -142,74 +257,37 @@ def main():
     argument_spec.update(
         vlans_list=dict(type='list', required=True, elements='dict', options=vlan),
         state=dict(type='str', default='present', choices=['present', 'absent']),
+        chunk_size=dict(type='int', default=100),
     )
 
     module = AnsibleModule(
         argument_spec,
         supports_check_mode=True,
     )
+    for vlan in module.params['vlans_list']:
+        if (vlan['name'] is None) == (vlan['name_prefix'] is None):
+            module.fail_json(msg='each vlans_list entry needs one of name or name_prefix: %s' % vlan)
+        if vlan['name_prefix'] is not None and not vlan['id']:
+            module.fail_json(msg='id is required with name_prefix: %s' % vlan)
+
     ucs = UCSModule(module)
     # UCSModule creation above verifies ucsmsdk is present and exits on failure.
     # Additional imports are done below or in called functions.
 
-    from ucsmsdk.mometa.fabric.FabricVlan import FabricVlan
-
     ucs.result['changed'] = False
-    commit_results = False
-    for vlan in module.params['vlans_list']:
-        props_match = False
-        # dn is fabric/lan/net-<name> for common vlans or fabric/lan/[A or B]/net-<name> for A or B
-        dn_base = 'fabric/lan'
-        if vlan['fabric'] != 'common':
-            dn_base += '/' + vlan['fabric']
-        dn = dn_base + '/net-' + vlan['name']
-        mo_exists = False
-
-        try:
-            mo = ucs.login_handle.query_dn(dn)
-            if mo:
-                mo_exists = True
-
-            if module.params['state'] == 'absent':
-                # mo must exist but all properties do not have to match
-                if mo_exists:
-                    if not module.check_mode:
-                        ucs.login_handle.remove_mo(mo)
-                        commit_results = True
-                    ucs.result['changed'] = True
-            else:
-                if mo_exists:
-                    # check top-level mo props
-                    kwargs = dict(id=vlan['id'])
-                    kwargs['default_net'] = vlan['native']
-                    kwargs['sharing'] = vlan['sharing']
-                    kwargs['mcast_policy_name'] = vlan['multicast_policy']
-                    if mo.check_prop_match(**kwargs):
-                        props_match = True
-
-                if not props_match:
-                    if not module.check_mode:
-                        # create if mo does not already exist
-                        mo = FabricVlan(
-                            parent_mo_or_dn=dn_base,
-                            name=vlan['name'],
-                            id=vlan['id'],
-                            default_net=vlan['native'],
-                            sharing=vlan['sharing'],
-                            mcast_policy_name=vlan['multicast_policy'],
-                        )
-
-                        ucs.login_handle.add_mo(mo, True)
-                        commit_results = True
-                    ucs.result['changed'] = True
-
-        except Exception as e:
-            ucs.result['msg'] = "setup error: %s " % str(e)
-            module.fail_json(**ucs.result)
-            break
-
-    if commit_results:
-        ucs.login_handle.commit()
+    ucs.result['requests'] = 0
+    # all VLAN changes are queued and sent in chunk_size configConfMos requests
+    txn = UCSTransaction(ucs.login_handle, chunk_size=module.params['chunk_size'])
+    try:
+        changes = diff_vlans(module, query_vlans(ucs), txn)
+        ucs.result.update(changes)
+        if any(changes.values()):
+            ucs.result['changed'] = True
+            if not module.check_mode:
+                ucs.result['requests'] = txn.commit()
+    except Exception as e:
+        ucs.result['msg'] = "setup error: %s " % str(e)
+        module.fail_json(**ucs.result)
 
     module.exit_json(**ucs.result)
 
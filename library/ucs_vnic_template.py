@@ -16,6 +16,8 @@ module: ucs_vnic_template
 short_description: Configures vNIC templates on Cisco UCS Manager
 description:
 - Configures vNIC templates on Cisco UCS Manager.
+- The template and its VLANs are read with one query.  For an existing template only the changed properties and the
+  VLANs to add, change or remove are sent, so a change to one VLAN does not resend every VLAN of the template.
 extends_documentation_fragment: ucs
 options:
   state:
@@ -197,11 +199,30 @@ EXAMPLES = r'''
 '''
 
 RETURN = r'''
-#
+props_changed:
+  description: Template properties that were set (or would be in check mode), all of them for a new template.
+  returned: when state is present
+  type: list
+  sample: ["mtu"]
+vlans_added:
+  description: VLANs added to the template (or that would be in check mode).
+  returned: when state is present
+  type: list
+  sample: ["finance"]
+vlans_removed:
+  description: VLANs removed from the template (or that would be in check mode).
+  returned: when state is present
+  type: list
+  sample: []
+vlans_modified:
+  description: VLANs of the template whose native setting was changed (or would be in check mode).
+  returned: when state is present
+  type: list
+  sample: ["default"]
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 
 def main():
@@ -244,18 +265,16 @@ def main():
 
     changed = False
     try:
-        mo_exists = False
-        props_match = False
         # dn is <org_dn>/lan-conn-templ-<name>
         dn = module.params['org_dn'] + '/lan-conn-templ-' + module.params['name']
 
-        mo = ucs.login_handle.query_dn(dn)
-        if mo:
-            mo_exists = True
+        # one hierarchical read gives the template and its VLAN interfaces
+        subtree = ucs.query_subtree(dn)
+        mo = subtree.get(dn)
 
         if module.params['state'] == 'absent':
             # mo must exist but all properties do not have to match
-            if mo_exists:
+            if mo:
                 if not module.check_mode:
                     ucs.login_handle.remove_mo(mo)
                     ucs.login_handle.commit()
@@ -271,95 +290,78 @@ def main():
             # for target 'adapter', change to internal UCS Manager spelling 'adaptor'
             if module.params['target'] == 'adapter':
                 module.params['target'] = 'adaptor'
-            if mo_exists:
-                # check top-level mo props
-                kwargs = dict(descr=module.params['description'])
-                kwargs['switch_id'] = module.params['fabric']
-                kwargs['redundancy_pair_type'] = module.params['redundancy_type']
-                kwargs['peer_redundancy_templ_name'] = module.params['peer_redundancy_template']
-                kwargs['ident_pool_name'] = module.params['mac_pool']
-                # do not check shared props if this is a secondary template
-                if module.params['redundancy_type'] != 'secondary':
-                    kwargs['target'] = module.params['target']
-                    kwargs['templ_type'] = module.params['template_type']
-                    kwargs['cdn_source'] = module.params['cdn_source']
-                    kwargs['admin_cdn_name'] = module.params['cdn_name']
-                    kwargs['mtu'] = module.params['mtu']
-                    kwargs['qos_policy_name'] = module.params['qos_policy']
-                    kwargs['nw_ctrl_policy_name'] = module.params['network_control_policy']
-                    kwargs['pin_to_group_name'] = module.params['pin_group']
-                    kwargs['stats_policy_name'] = module.params['stats_policy']
-                if mo.check_prop_match(**kwargs):
-                    # top-level props match, check next level mo/props
-                    if not module.params.get('vlans_list'):
-                        props_match = True
-                    else:
-                        # check vlan props
-                        for vlan in module.params['vlans_list']:
-                            child_dn = dn + '/if-' + str(vlan['name'])
-                            mo_1 = ucs.login_handle.query_dn(child_dn)
-                            if vlan['state'] == 'absent':
-                                if mo_1:
-                                    props_match = False
-                                    break
-                            else:
-                                if mo_1:
-                                    kwargs = dict(default_net=vlan['native'])
-                                    if mo_1.check_prop_match(**kwargs):
-                                        props_match = True
-                                else:
-                                    props_match = False
-                                    break
 
-            if not props_match:
-                if not module.check_mode:
-                    # create if mo does not already exist
-                    # secondary template only sets non shared props
-                    if module.params['redundancy_type'] == 'secondary':
-                        mo = VnicLanConnTempl(
-                            parent_mo_or_dn=module.params['org_dn'],
-                            name=module.params['name'],
-                            descr=module.params['description'],
-                            switch_id=module.params['fabric'],
-                            redundancy_pair_type=module.params['redundancy_type'],
-                            peer_redundancy_templ_name=module.params['peer_redundancy_template'],
-                            ident_pool_name=module.params['mac_pool'],
-                        )
-                    else:
-                        mo = VnicLanConnTempl(
-                            parent_mo_or_dn=module.params['org_dn'],
-                            name=module.params['name'],
-                            descr=module.params['description'],
-                            switch_id=module.params['fabric'],
-                            redundancy_pair_type=module.params['redundancy_type'],
-                            peer_redundancy_templ_name=module.params['peer_redundancy_template'],
-                            target=module.params['target'],
-                            templ_type=module.params['template_type'],
-                            cdn_source=module.params['cdn_source'],
-                            admin_cdn_name=module.params['cdn_name'],
-                            mtu=module.params['mtu'],
-                            ident_pool_name=module.params['mac_pool'],
-                            qos_policy_name=module.params['qos_policy'],
-                            nw_ctrl_policy_name=module.params['network_control_policy'],
-                            pin_to_group_name=module.params['pin_group'],
-                            stats_policy_name=module.params['stats_policy'],
-                        )
+            # top-level mo props
+            kwargs = dict(descr=module.params['description'])
+            kwargs['switch_id'] = module.params['fabric']
+            kwargs['redundancy_pair_type'] = module.params['redundancy_type']
+            kwargs['peer_redundancy_templ_name'] = module.params['peer_redundancy_template']
+            kwargs['ident_pool_name'] = module.params['mac_pool']
+            # secondary template only sets non shared props
+            if module.params['redundancy_type'] != 'secondary':
+                kwargs['target'] = module.params['target']
+                kwargs['templ_type'] = module.params['template_type']
+                kwargs['cdn_source'] = module.params['cdn_source']
+                kwargs['admin_cdn_name'] = module.params['cdn_name']
+                kwargs['mtu'] = module.params['mtu']
+                kwargs['qos_policy_name'] = module.params['qos_policy']
+                kwargs['nw_ctrl_policy_name'] = module.params['network_control_policy']
+                kwargs['pin_to_group_name'] = module.params['pin_group']
+                kwargs['stats_policy_name'] = module.params['stats_policy']
 
-                    if module.params.get('vlans_list'):
-                        for vlan in module.params['vlans_list']:
-                            if vlan['state'] == 'absent':
-                                child_dn = dn + '/if-' + str(vlan['name'])
-                                mo_1 = ucs.login_handle.query_dn(child_dn)
-                                ucs.login_handle.remove_mo(mo_1)
-                            else:
-                                mo_1 = VnicEtherIf(
-                                    parent_mo_or_dn=mo,
-                                    name=str(vlan['name']),
-                                    default_net=vlan['native'],
-                                )
+            txn = UCSTransaction(ucs.login_handle)
+            vlans_added = []
+            vlans_removed = []
+            vlans_modified = []
+            if not mo:
+                # create the template with all of its VLANs in one object
+                props_changed = sorted(kwargs)
+                mo = VnicLanConnTempl(
+                    parent_mo_or_dn=module.params['org_dn'],
+                    name=module.params['name'],
+                    **kwargs
+                )
+                for vlan in module.params.get('vlans_list') or []:
+                    if vlan['state'] == 'present':
+                        VnicEtherIf(
+                            parent_mo_or_dn=mo,
+                            name=str(vlan['name']),
+                            default_net=vlan['native'],
+                        )
+                        vlans_added.append(str(vlan['name']))
+                txn.add_mo(mo, True)
+            else:
+                # only send the props that differ and the VLAN interfaces to add or remove, so UCSM does not
+                # get (and propagate to bound service profiles) the whole template for each change
+                props_changed = sorted(prop for prop, value in kwargs.items() if getattr(mo, prop) != value)
+                if props_changed:
+                    txn.add_mo(VnicLanConnTempl(
+                        parent_mo_or_dn=module.params['org_dn'],
+                        name=module.params['name'],
+                        **dict((prop, kwargs[prop]) for prop in props_changed)
+                    ), True)
+                for vlan in module.params.get('vlans_list') or []:
+                    child_dn = dn + '/if-' + str(vlan['name'])
+                    mo_1 = subtree.get(child_dn)
+                    if vlan['state'] == 'absent':
+                        if mo_1:
+                            txn.remove_mo(mo_1)
+                            vlans_removed.append(str(vlan['name']))
+                    elif not mo_1 or not mo_1.check_prop_match(default_net=vlan['native']):
+                        txn.add_mo(VnicEtherIf(
+                            parent_mo_or_dn=dn,
+                            name=str(vlan['name']),
+                            default_net=vlan['native'],
+                        ), True)
+                        (vlans_modified if mo_1 else vlans_added).append(str(vlan['name']))
 
-                    ucs.login_handle.add_mo(mo, True)
-                    ucs.login_handle.commit()
+            ucs.result['props_changed'] = props_changed
+            ucs.result['vlans_added'] = vlans_added
+            ucs.result['vlans_removed'] = vlans_removed
+            ucs.result['vlans_modified'] = vlans_modified
+            if props_changed or vlans_added or vlans_removed or vlans_modified:
+                if not module.check_mode:
+                    txn.commit()
                 changed = True
 
     except Exception as e:
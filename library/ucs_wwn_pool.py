@@ -115,7 +115,7 @@ RETURN = r'''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.remote_management.ucs import UCSModule, ucs_argument_spec
+from ansible.module_utils.remote_management.ucs import UCSModule, UCSTransaction, ucs_argument_spec
 
 
 def main():
@@ -154,6 +154,8 @@ def main():
     from ucsmsdk.mometa.fcpool.FcpoolBlock import FcpoolBlock
 
     changed = False
+    # queue changes so they are sent in a single configConfMos request
+    txn = UCSTransaction(ucs.login_handle)
     try:
         # Only documented use is a single resource, but to also support experimental
         # feature allowing multiple updates all params are converted to a wwn_list below.
@@ -182,8 +184,7 @@ def main():
             if module.params['state'] == 'absent':
                 if mo_exists:
                     if not module.check_mode:
-                        ucs.login_handle.remove_mo(mo)
-                        ucs.login_handle.commit()
+                        txn.remove_mo(mo)
                     changed = True
             else:
                 # append purpose param with suffix used by UCSM
@@ -220,10 +221,11 @@ def main():
                                 r_from=wwn['first_addr'],
                             )
 
-                        ucs.login_handle.add_mo(mo, True)
-                        ucs.login_handle.commit()
+                        txn.add_mo(mo, True)
                     changed = True
 
+        txn.commit()
+
     except Exception as e:
         err = True
         ucs.result['msg'] = "setup error: %s " % str(e)
@@ -27,14 +27,32 @@
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import re
+import socket
+import tempfile
+import time
 import traceback
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 
 # from ansible.module_utils.basic import missing_required_lib
 
 UCSMSDK_IMP_ERR = None
 try:
-    import ucsmsdk
-    HAS_UCSMSDK = True
+    # only locate ucsmsdk here; importing it is left to the code that uses it so
+    # the import cost is not paid before the module has parsed its arguments
+    try:
+        from importlib.util import find_spec
+        HAS_UCSMSDK = find_spec('ucsmsdk') is not None
+    except ImportError:
+        import imp
+        imp.find_module('ucsmsdk')
+        HAS_UCSMSDK = True
 except Exception:
     UCSMSDK_IMP_ERR = traceback.format_exc()
     HAS_UCSMSDK = False
@@ -47,52 +65,745 @@ ucs_argument_spec = dict(
     use_ssl=dict(type='bool', default=True),
     use_proxy=dict(type='bool', default=True),
     proxy=dict(type='str', default=None),
+    session_cache=dict(type='bool', default=False),
+    session_cache_path=dict(type='path', default='~/.ansible/ucs_session_cache.json'),
+    session_cache_ttl=dict(type='int', default=540),
+    keep_alive=dict(type='bool', default=False),
+    perf_trace_path=dict(type='path', default=None),
 )
 
 
+def parse_vlan_ids(ids):
+    """Yield each VLAN ID in a comma separated list of IDs and ID ranges such as '100-199,300'."""
+    for part in ids.split(','):
+        bounds = [bound.strip() for bound in part.split('-')]
+        if len(bounds) > 2 or not all(bound.isdigit() for bound in bounds):
+            raise ValueError("Bad VLAN ID range: '%s'" % part)
+        start, end = int(bounds[0]), int(bounds[-1])
+        if start > end:
+            start, end = end, start
+        for vlan_id in range(start, end + 1):
+            yield str(vlan_id)
+
+
+def profile_names(params):
+    """Return the profile names of a names or name_prefix, start_index and count task, in order and without duplicates."""
+    if params['names'] is not None:
+        names = params['names']
+    else:
+        names = [params['name_prefix'] + str(index) for index in range(params['start_index'], params['start_index'] + params['count'])]
+    unique = []
+    for name in names:
+        if name not in unique:
+            unique.append(name)
+    return unique
+
+
+def query_profiles(ucs, org_dn, class_id):
+    """Return a dict of dn to XML properties for the class_id objects directly in org_dn, read with one children query."""
+    from ucsmsdk.ucsmethodfactory import config_resolve_children
+
+    elem = config_resolve_children(cookie=ucs.login_handle.cookie, class_id=class_id, in_dn=org_dn,
+                                   in_filter=None, in_hierarchical=False)
+    return dict((props['dn'], props) for child_class_id, props in ucs.stream_query(elem))
+
+
+class UCSFileCache():
+    """On disk JSON store of values shared by module runs, each kept for ttl seconds.
+
+    Values must be JSON serializable.  All reads and writes are serialized
+    through an exclusive lock on a sidecar lock file so concurrent forks do
+    not clobber each other, and expired entries are dropped on every access.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+
+    def _cache_dir(self):
+        cache_dir = os.path.dirname(self.path) or '.'
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        return cache_dir
+
+    def _locked(self, update):
+        cache_dir = self._cache_dir()
+        lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                with open(self.path) as cache_file:
+                    entries = json.load(cache_file)
+            except (IOError, OSError, ValueError):
+                entries = {}
+            now = time.time()
+            for key in list(entries):
+                if entries[key].get('expires', 0) <= now:
+                    del entries[key]
+            result, dirty = update(entries, now)
+            if dirty:
+                fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+                with os.fdopen(fd, 'w') as cache_file:
+                    json.dump(entries, cache_file)
+                os.chmod(tmp_path, 0o600)
+                os.rename(tmp_path, self.path)
+            return result
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    def get(self, key):
+        """Return the value stored for key, or None if there is none or it has expired."""
+        def update(entries, now):
+            entry = entries.get(key)
+            return (entry.get('value') if entry else None), False
+        return self._locked(update)
+
+    def put(self, key, value, ttl=None):
+        """Store value for key for ttl seconds (default the ttl of the cache)."""
+        ttl = self.ttl if ttl is None else ttl
+
+        def update(entries, now):
+            entries[key] = dict(value=value, expires=now + ttl)
+            return None, True
+        self._locked(update)
+
+    def remove(self, key):
+        def update(entries, now):
+            return None, entries.pop(key, None) is not None
+        self._locked(update)
+
+
+class UCSSessionCache(UCSFileCache):
+    """On disk store of UCSM session cookies shared by module runs.
+
+    Entries are keyed by hostname, username, port, scheme and proxy and hold a
+    frozen UcsHandle (without the password).  session_lock() serializes the
+    refresh or login of one key, so concurrent forks for the same domain
+    share one session instead of each logging in and replacing the last.
+    """
+
+    @staticmethod
+    def key(params):
+        """Return the cache key of the session for the connection params of a module."""
+        if params['use_proxy']:
+            proxy = params['proxy'] or ''
+        else:
+            proxy = 'none'
+        return '%s|%s|%s|%s|%s' % (params['hostname'], params['username'], params['port'] or '',
+                                   'https' if params['use_ssl'] else 'http', proxy)
+
+    @contextmanager
+    def session_lock(self, key):
+        """Hold an exclusive lock on key from the get of its session to the put of the new one.
+
+        Each key locks one byte of a second sidecar file, so forks for other
+        domains are not held up by a slow login.
+        """
+        self._cache_dir()
+        lock_fd = os.open(self.path + '.login.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            offset = int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16)
+            fcntl.lockf(lock_fd, fcntl.LOCK_EX, 1, offset)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(lock_fd)
+
+    def put(self, key, frozen_handle, refresh_period=None):
+        ttl = self.ttl
+        if refresh_period:
+            ttl = min(ttl, int(refresh_period))
+        UCSFileCache.put(self, key, frozen_handle, ttl)
+
+
+class UCSTransaction():
+    """Queues MO changes for a module run and commits them together.
+
+    add_mo/set_mo/remove_mo only record the change.  commit() sends the queue
+    as a single configConfMos request, or, when the queued trees hold more than
+    chunk_size objects, as consecutive requests of at most chunk_size objects
+    each (a single tree larger than chunk_size is sent on its own).  Each
+    configConfMos is applied atomically by UCSM, so a failure leaves the
+    earlier chunks in place.
+
+    ucsmsdk keeps the changes of a request keyed by DN, so a second change to
+    a queued DN would silently replace the first (or, in a later chunk, be
+    applied after it).  Queueing the same DN twice raises ValueError instead.
+    """
+
+    def __init__(self, handle, chunk_size=100):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.queue = []
+        self.dns = set()
+
+    def _queue(self, method, mo, modify_present=None):
+        if mo.dn in self.dns:
+            raise ValueError('%s is already queued in this transaction' % mo.dn)
+        self.dns.add(mo.dn)
+        self.queue.append((method, mo, modify_present))
+
+    def add_mo(self, mo, modify_present=False):
+        self._queue('add_mo', mo, modify_present)
+
+    def set_mo(self, mo):
+        self._queue('set_mo', mo)
+
+    def remove_mo(self, mo):
+        self._queue('remove_mo', mo)
+
+    @staticmethod
+    def mo_count(mo):
+        count = 1
+        for child in mo.child:
+            count += UCSTransaction.mo_count(child)
+        return count
+
+    def chunks(self):
+        chunk = []
+        chunk_count = 0
+        for op in self.queue:
+            count = self.mo_count(op[1])
+            if chunk and chunk_count + count > self.chunk_size:
+                yield chunk
+                chunk = []
+                chunk_count = 0
+            chunk.append(op)
+            chunk_count += count
+        if chunk:
+            yield chunk
+
+    def commit(self):
+        """Commit all queued changes and return the number of requests used."""
+        requests = 0
+        for chunk in self.chunks():
+            for method, mo, modify_present in chunk:
+                if method == 'add_mo':
+                    self.handle.add_mo(mo, modify_present)
+                else:
+                    getattr(self.handle, method)(mo)
+            self.handle.commit()
+            requests += 1
+        self.queue = []
+        self.dns = set()
+        return requests
+
+
+class UCSKeepAliveTransport():
+    """Stand-in for the UcsDriver of a UcsHandle that reuses connections.
+
+    ucsmsdk opens a new connection (and does a full TLS handshake) for every
+    request.  This keeps one HTTP/1.1 connection open per endpoint and resumes
+    the TLS session when a connection has to be reopened.  stats counts
+    connections opened, requests sent on an already open connection, TLS
+    handshakes that resumed a session and requests that had to be resent.
+
+    Redirects, file transfers and servers that need the TLSv1 fallback are
+    left to the original driver.  Like ucsmsdk, certificates are not verified.
+    """
+
+    def __init__(self, driver):
+        import ssl
+
+        self.driver = driver
+        self.headers = {}
+        self.connections = {}
+        self.tls_sessions = {}
+        self.fallback = False
+        self.stats = dict(connections=0, reused=0, tls_resumed=0, retries=0)
+        self.context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_SSLv23))
+        self.context.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3
+        self.context.check_hostname = False
+        self.context.verify_mode = ssl.CERT_NONE
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def add_header(self, header_prop, header_value):
+        self.headers[header_prop] = header_value
+        self.driver.add_header(header_prop, header_value)
+
+    def remove_header(self, header_prop):
+        self.headers.pop(header_prop, None)
+        self.driver.remove_header(header_prop)
+
+    def _connect(self, key, timeout):
+        import ssl
+        from ansible.module_utils.six.moves import http_client
+
+        scheme, host, port = key
+        if scheme == 'https':
+            connection = http_client.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            connection = http_client.HTTPConnection(host, port, timeout=timeout)
+        sock = socket.create_connection((host, port), timeout)
+        # small request/response exchanges on a kept open connection stall on Nagle's algorithm otherwise
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if scheme == 'https':
+            kwargs = dict(server_hostname=host)
+            if hasattr(ssl.SSLSocket, 'session') and self.tls_sessions.get(key):
+                kwargs['session'] = self.tls_sessions[key]
+            sock = self.context.wrap_socket(sock, **kwargs)
+            if getattr(sock, 'session_reused', False):
+                self.stats['tls_resumed'] += 1
+        # http_client only connects by itself when sock is not set
+        connection.sock = sock
+        self.stats['connections'] += 1
+        return connection
+
+    @staticmethod
+    def stale(error):
+        """Return True if error shows that the server had closed a kept open connection.
+
+        That is the case when writing the request fails with a broken pipe or
+        connection reset, or the connection is dropped before any response
+        bytes arrive (RemoteDisconnected).  The request did not reach UCSM then
+        and is safe to resend.  Timeouts and errors after the response started
+        are never treated as stale, as the request may have been applied.
+        """
+        from ansible.module_utils.six.moves import http_client
+
+        if isinstance(error, socket.timeout):
+            return False
+        if isinstance(error, getattr(http_client, 'RemoteDisconnected', ())):
+            return True
+        return isinstance(error, socket.error) and error.errno in (errno.EPIPE, errno.ECONNRESET)
+
+    def _request(self, key, path, data, timeout):
+        headers = dict(self.headers)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        while True:
+            connection = self.connections.pop(key, None)
+            reused = connection is not None
+            if reused:
+                connection.timeout = timeout
+                connection.sock.settimeout(timeout)
+            else:
+                connection = self._connect(key, timeout)
+            try:
+                connection.request('POST', path, body=data, headers=headers)
+                response = connection.getresponse()
+            except Exception as e:
+                connection.close()
+                if reused and self.stale(e):
+                    # the server closed the idle connection, retry on a new one
+                    self.stats['retries'] += 1
+                    continue
+                raise
+            if reused:
+                self.stats['reused'] += 1
+            return connection, response
+
+    def _release(self, key, connection, response):
+        """Keep connection open for the next request once response has been read to the end."""
+        if getattr(connection.sock, 'session', None) is not None:
+            self.tls_sessions[key] = connection.sock.session
+        if response.isclosed() and not response.will_close:
+            self.connections[key] = connection
+        else:
+            # unread response data would be taken as the response to the next request
+            connection.close()
+
+    def post(self, uri, data=None, dump_xml=False, read=True, timeout=None):
+        import ssl
+        from ansible.module_utils.six.moves.urllib.error import HTTPError
+        from ansible.module_utils.six.moves.urllib.parse import urlparse
+
+        if self.fallback or self.driver.redirect_uri:
+            return self.driver.post(uri, data=data, dump_xml=dump_xml, read=read, timeout=timeout)
+
+        parts = urlparse(uri)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        try:
+            connection, response = self._request(key, parts.path or '/', data, timeout)
+        except ssl.SSLError:
+            # let ucsmsdk fall back to TLSv1 for this server
+            self.fallback = True
+            self.stats['retries'] += 1
+            return self.driver.post(uri, data=data, dump_xml=dump_xml, read=read, timeout=timeout)
+
+        if response.status in (301, 302):
+            connection.close()
+            return self.driver.post(uri, data=data, dump_xml=dump_xml, read=read, timeout=timeout)
+        if response.status >= 400:
+            connection.close()
+            raise HTTPError(uri, response.status, response.reason, response.msg, None)
+        if not read:
+            # the caller owns the connection until it has read and closed the response
+            return UCSPerfStream(response, lambda size: self._release(key, connection, response))
+
+        body = response.read().decode('utf-8')
+        self._release(key, connection, response)
+        return body
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+
+class UCSPerfRecorder():
+    """Stand-in for the driver of a UcsHandle that records every XML API call.
+
+    Each call is recorded with its method, the dn or class it targets (or the
+    number of objects for batch methods), its latency, request and response
+    bytes and the number of times the transport had to resend it.  summary
+    is updated in place as calls are made, so it can be put in the module
+    result before the first call.  With trace_path set, every call is also
+    appended to that file as a line of JSON.
+    """
+
+    slowest_count = 5
+    # batch methods and the child elements that make up the batch
+    batch_elements = dict(configResolveDns='dn', configResolveClasses='classId', configConfMos='pair')
+
+    def __init__(self, hostname, trace_path=None, module_name=None):
+        self.driver = None
+        self.hostname = hostname
+        self.trace_path = trace_path
+        self.module_name = module_name
+        self.summary = dict(
+            hostname=hostname,
+            round_trips=0,
+            logins=0,
+            retries=0,
+            elapsed=0.0,
+            request_bytes=0,
+            response_bytes=0,
+            methods={},
+            slowest=[],
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def describe(self, data):
+        call = dict(method=None, request_bytes=len(data or ''))
+        try:
+            root = ET.fromstring(data)
+        except Exception:
+            return call
+        call['method'] = root.tag
+        if root.tag in self.batch_elements:
+            call['count'] = len(list(root.iter(self.batch_elements[root.tag])))
+        else:
+            target = root.get('dn') or root.get('classId') or root.get('inDn')
+            if target:
+                call['target'] = target
+        return call
+
+    def post(self, uri, data=None, dump_xml=False, read=True, timeout=None):
+        call = self.describe(data)
+        stats = getattr(self.driver, 'stats', {})
+        retries = stats.get('retries', 0)
+        start = time.time()
+        try:
+            response = self.driver.post(uri, data=data, dump_xml=dump_xml, read=read, timeout=timeout)
+        except Exception as e:
+            call['retries'] = stats.get('retries', 0) - retries
+            call['error'] = str(e)
+            self.record(call, start, None)
+            raise
+        call['retries'] = stats.get('retries', 0) - retries
+        if not read:
+            # streamed responses are recorded once the caller has read and closed them
+            return UCSPerfStream(response, lambda size: self.record(call, start, size))
+        self.record(call, start, response)
+        return response
+
+    def record(self, call, start, response):
+        call['elapsed'] = round(time.time() - start, 4)
+        if isinstance(response, int):
+            call['response_bytes'] = response
+        else:
+            call['response_bytes'] = len(response or '')
+            head = response[:256] if response else ''
+            if not isinstance(head, str):
+                head = head.decode('utf-8', 'replace')
+            match = re.search(r'errorCode="([^"]*)"', head)
+            if match:
+                call['error_code'] = match.group(1)
+
+        summary = self.summary
+        summary['round_trips'] += 1
+        summary['retries'] += call['retries']
+        summary['elapsed'] = round(summary['elapsed'] + call['elapsed'], 4)
+        summary['request_bytes'] += call['request_bytes']
+        summary['response_bytes'] += call['response_bytes']
+        if call['method'] == 'aaaLogin':
+            summary['logins'] += 1
+        method = summary['methods'].setdefault(
+            call['method'], dict(calls=0, elapsed=0.0, request_bytes=0, response_bytes=0))
+        method['calls'] += 1
+        method['elapsed'] = round(method['elapsed'] + call['elapsed'], 4)
+        method['request_bytes'] += call['request_bytes']
+        method['response_bytes'] += call['response_bytes']
+        summary['slowest'] = sorted(summary['slowest'] + [call], key=lambda c: -c['elapsed'])[:self.slowest_count]
+
+        if self.trace_path:
+            entry = dict(call, time=round(start, 4), hostname=self.hostname, module=self.module_name)
+            try:
+                with open(self.trace_path, 'a') as trace:
+                    trace.write(json.dumps(entry, sort_keys=True) + '\n')
+            except Exception:
+                # tracing must never fail the task
+                pass
+
+
+class UCSPerfStream():
+    """File-like wrapper of a streamed response that counts the bytes read.
+
+    done is called with the byte count when the stream is closed, before the
+    response itself is closed.
+    """
+
+    def __init__(self, stream, done):
+        self.stream = stream
+        self.done = done
+        self.size = 0
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self.size += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self.stream.readline(*args)
+        self.size += len(data)
+        return data
+
+    def close(self):
+        if self.done:
+            self.done(self.size)
+            self.done = None
+        self.stream.close()
+
+
 class UCSModule():
 
-    def __init__(self, module):
+    def __init__(self, module, params=None):
+        """Log in to the UCS domain given by module.params.
+
+        Modules that work on several domains pass the connection params of one
+        domain in params.  Errors are then raised to the caller instead of
+        failing the module, so one unreachable domain does not end the run.
+        """
         self.module = module
+        self.params = module.params if params is None else params
         self.result = {}
         if not HAS_UCSMSDK:
+            if params is not None:
+                raise ImportError('ucsmsdk is required for this module')
             # self.module.fail_json(msg=missing_required_lib('ucsmsdk'), exception=UCSMSDK_IMP_ERR)
             self.module.fail_json(msg='ucsmsdk is required for this module')
-        self.login()
+        if params is None:
+            self.login()
+        else:
+            self.login_handle = self.connect()
 
     def __del__(self):
         self.logout()
 
     def login(self):
+        try:
+            handle = self.connect()
+        except Exception as e:
+            self.result['msg'] = str(e)
+            self.module.fail_json(**self.result)
+        self.login_handle = handle
+
+    def connect(self):
+        """Return a logged in UcsHandle for self.params, raising on failure."""
         from ucsmsdk.ucshandle import UcsHandle
 
         # use_proxy=yes (default) and proxy=None (default) should be using the system defined proxy
         # use_proxy=yes (default) and proxy=value should use the provided proxy
         # use_proxy=no (user) should not be using a proxy
-        if self.module.params['use_proxy']:
-            proxy = self.module.params['proxy']
+        if self.params['use_proxy']:
+            proxy = self.params['proxy']
         else:
             # force no proxy to be used.  Note that proxy=None in UcsHandle will
             # use the system proxy so we must set to something else
             proxy = {}
 
-        try:
-            handle = UcsHandle(
-                ip=self.module.params['hostname'],
-                username=self.module.params['username'],
-                password=self.module.params['password'],
-                port=self.module.params['port'],
-                secure=self.module.params['use_ssl'],
-                proxy=proxy
+        handle = UcsHandle(
+            ip=self.params['hostname'],
+            username=self.params['username'],
+            password=self.params['password'],
+            port=self.params['port'],
+            secure=self.params['use_ssl'],
+            proxy=proxy
+        )
+        self.transport = None
+        if self.params.get('keep_alive') and not self.uses_proxy(proxy):
+            self.transport = UCSKeepAliveTransport(handle._UcsSession__driver)
+        self.perf = UCSPerfRecorder(
+            self.params['hostname'],
+            trace_path=self.params.get('perf_trace_path'),
+            module_name=getattr(self.module, '_name', None),
+        )
+        if self.transport:
+            self.perf.summary['transport'] = self.transport.stats
+        self.result['ucs_perf'] = self.perf.summary
+        self.install_transport(handle)
+        if self.params.get('session_cache'):
+            self.session_cache = UCSSessionCache(
+                self.params['session_cache_path'],
+                self.params['session_cache_ttl'],
             )
+            self.session_key = UCSSessionCache.key(self.params)
+            with self.session_cache.session_lock(self.session_key):
+                if not self.resume_session(handle):
+                    handle.login()
+                self.save_session(handle)
+        else:
             handle.login()
-        except Exception as e:
-            self.result['msg'] = str(e)
-            self.module.fail_json(**self.result)
-        self.login_handle = handle
+        return handle
+
+    def uses_proxy(self, proxy):
+        """Return True if requests to the domain would go through a proxy."""
+        from ansible.module_utils.six.moves.urllib.request import getproxies, proxy_bypass
+
+        if proxy == {}:
+            return False
+        if proxy:
+            return True
+        scheme = 'https' if self.params['use_ssl'] else 'http'
+        return scheme in getproxies() and not proxy_bypass(self.params['hostname'])
+
+    def install_transport(self, handle):
+        """Put the keep-alive transport and the perf recorder in front of the handle's driver."""
+        driver = handle._UcsSession__driver
+        if self.transport:
+            self.transport.driver = driver
+            driver = self.transport
+        self.perf.driver = driver
+        handle._UcsSession__driver = self.perf
+
+    def resume_session(self, handle):
+        """Restore a cached cookie into handle and refresh it with aaaRefresh.
+
+        Returns False when there is no usable cached session and a full
+        aaaLogin is needed.
+        """
+        from ucsmsdk.ucsmethodfactory import aaa_refresh
+
+        frozen_handle = self.session_cache.get(self.session_key)
+        if not frozen_handle:
+            return False
+        # _unfreeze replaces the handle's driver
+        handle._unfreeze(frozen_handle)
+        self.install_transport(handle)
+        try:
+            elem = aaa_refresh(handle.cookie, self.params['username'], self.params['password'])
+            # post_elem updates the handle cookie from the aaaRefresh response
+            response = handle.post_elem(elem)
+        except Exception:
+            response = None
+        if response is None or response.error_code != 0 or not handle.cookie:
+            self.session_cache.remove(self.session_key)
+            handle._unfreeze(json.dumps(dict(cookie=None)))
+            self.install_transport(handle)
+            return False
+        return True
+
+    def save_session(self, handle):
+        frozen_handle = json.loads(handle.freeze())
+        # never write the password to disk, it is supplied on every run
+        frozen_handle.pop('password', None)
+        frozen_handle.pop('proxy', None)
+        self.session_cache.put(self.session_key, json.dumps(frozen_handle), handle.refresh_period)
+
+    def query_subtree(self, dn):
+        """Return a dict of dn to MO for dn and every object below it.
+
+        Uses a single hierarchical configResolveDn so callers can look up
+        child objects without a query_dn per child.  The dict is empty if dn
+        does not exist.
+        """
+        mo_list = self.login_handle.query_dn(dn, hierarchy=True)
+        return dict((mo.dn, mo) for mo in mo_list)
+
+    def stream_query(self, elem):
+        """Send a query method element and parse the response as it arrives.
+
+        Returns a generator of (class_id, props) for each object in the
+        response outConfigs, where props holds the XML attributes.  Objects are
+        dropped from the parse tree once yielded, so memory use does not grow
+        with the size of the response.
+        """
+        from ucsmsdk.ucsexception import UcsException
+        from ucsmsdk.ucsxmlcodec import to_xml_str
+
+        if self.login_handle._is_stale_cookie(elem):
+            elem.attrib['cookie'] = self.login_handle.cookie
+        stream = self.login_handle.post_xml(to_xml_str(elem), read=False)
+        try:
+            depth = 0
+            out_configs = None
+            for event, node in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 1 and node.get('errorCode'):
+                        raise UcsException(node.get('errorCode'), node.get('errorDescr'))
+                    if depth == 2 and node.tag == 'outConfigs':
+                        out_configs = node
+                    continue
+                depth -= 1
+                if depth == 2 and out_configs is not None:
+                    yield node.tag, dict(node.attrib)
+                    out_configs.remove(node)
+                elif depth == 1 and node is out_configs:
+                    # objects of later elements such as outUnresolved are not results
+                    out_configs = None
+        finally:
+            stream.close()
+
+    def subscribe_events(self, timeout):
+        """Open the UCSM event channel (eventSubscribe) on the module's session.
+
+        The subscription is in place when this returns, so changes made after
+        the call are not missed.  Returns a generator of (class_id, props) for
+        each managed object change event, where props holds the XML attributes
+        UCSM sent (dn, status and the changed properties).  The generator ends
+        once timeout seconds have passed; close() it to drop the channel early.
+        """
+        deadline = time.time() + timeout
+        xml_str = '<eventSubscribe cookie="%s"/>' % self.login_handle.cookie
+        stream = self.login_handle.post_xml(xml_str=xml_str.encode(), read=False, timeout=timeout)
+        return self._read_events(stream, deadline)
+
+    @staticmethod
+    def _read_events(stream, deadline):
+        try:
+            while time.time() < deadline:
+                try:
+                    # each event is sent as a length line followed by that many bytes of XML
+                    length = stream.readline()
+                    if not length:
+                        return
+                    if not length.strip():
+                        continue
+                    root = ET.fromstring(stream.read(int(length)))
+                except socket.timeout:
+                    return
+                for in_config in root.iter('inConfig'):
+                    for mo_elem in in_config:
+                        yield mo_elem.tag, dict(mo_elem.attrib)
+        finally:
+            stream.close()
 
     def logout(self):
         if hasattr(self, 'login_handle'):
+            if hasattr(self, 'session_cache'):
+                # cached sessions are left open for the next module run
+                return False
             self.login_handle.logout()
+            if getattr(self, 'transport', None):
+                self.transport.close()
             return True
         return False
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Record the import time of each library/ucs_*.py module.
+
+Every module is timed in a fresh interpreter, as each Ansible task runs its
+module in a new process.  Two phases are measured:
+
+  module   importing the module file itself (AnsibleModule and
+           module_utils/remote_management/ucs.py), before main() runs
+  ucsmsdk  the ucsmsdk imports main() makes: UcsHandle for the login plus
+           every ucsmsdk import found in the module's functions
+
+eager_ucsmsdk is true when ucsmsdk was already imported by the first phase,
+i.e. the module (or module_utils) imports it at load time.
+
+  python test/startup_benchmark.py --output startup.json
+  python test/startup_benchmark.py --baseline startup.json
+
+With --baseline the run fails if a module got slower than the baseline by
+more than --tolerance (relative) plus --slack milliseconds, or if it started
+importing ucsmsdk eagerly.
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in the child interpreter: argv is module path, then ucsmsdk imports as module:name
+PROBE = r'''
+import sys
+import time
+import types
+
+start = time.time()
+import ansible.module_utils
+package = types.ModuleType('ansible.module_utils.remote_management')
+package.__path__ = [sys.argv[1]]
+sys.modules[package.__name__] = package
+
+import importlib.util
+spec = importlib.util.spec_from_file_location('ansible_module_under_test', sys.argv[2])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+loaded = time.time()
+eager = 'ucsmsdk' in sys.modules
+
+import importlib
+for name in sys.argv[3:]:
+    mod_name, attr = name.split(':')
+    getattr(importlib.import_module(mod_name), attr)
+done = time.time()
+print('%f %f %d' % (loaded - start, done - loaded, eager))
+'''
+
+
+def ucsmsdk_imports(path):
+    """Return the ucsmsdk 'module:name' imports made inside functions of path."""
+    with open(path) as source:
+        tree = ast.parse(source.read(), path)
+    imports = ['ucsmsdk.ucshandle:UcsHandle']
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            for child in ast.walk(node):
+                if isinstance(child, ast.ImportFrom) and (child.module or '').startswith('ucsmsdk'):
+                    imports.extend('%s:%s' % (child.module, alias.name) for alias in child.names)
+    return sorted(set(imports))
+
+
+def measure(path, repeat):
+    """Return the fastest of repeat runs for path in milliseconds."""
+    best = None
+    args = [sys.executable, '-c', PROBE, os.path.join(ROOT, 'module_utils', 'remote_management'), path]
+    args.extend(ucsmsdk_imports(path))
+    for _ in range(repeat):
+        output = subprocess.check_output(args, cwd=ROOT).decode().split()
+        module_ms, ucsmsdk_ms = float(output[0]) * 1000, float(output[1]) * 1000
+        if best is None or module_ms + ucsmsdk_ms < best['total_ms']:
+            best = dict(
+                module_ms=round(module_ms, 1),
+                ucsmsdk_ms=round(ucsmsdk_ms, 1),
+                total_ms=round(module_ms + ucsmsdk_ms, 1),
+                eager_ucsmsdk=output[2] == '1',
+            )
+    return best
+
+
+def regressions(report, baseline, tolerance, slack):
+    found = []
+    for name, result in sorted(report.items()):
+        before = baseline.get(name)
+        if not before:
+            continue
+        limit = before['total_ms'] * (1 + tolerance) + slack
+        if result['total_ms'] > limit:
+            found.append('%s: %.1f ms, baseline %.1f ms (limit %.1f ms)' % (name, result['total_ms'], before['total_ms'], limit))
+        if result['eager_ucsmsdk'] and not before['eager_ucsmsdk']:
+            found.append('%s: now imports ucsmsdk at load time' % name)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('modules', nargs='*', help='module files (default library/ucs_*.py)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per module, the fastest is kept')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--slack', type=float, default=20.0, help='allowed absolute slowdown in ms')
+    args = parser.parse_args()
+
+    paths = args.modules or sorted(glob.glob(os.path.join(ROOT, 'library', 'ucs_*.py')))
+    report = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        report[name] = measure(os.path.abspath(path), args.repeat)
+        print('%-40s module %7.1f ms  ucsmsdk %7.1f ms%s' % (
+            name, report[name]['module_ms'], report[name]['ucsmsdk_ms'],
+            '  (eager ucsmsdk import)' if report[name]['eager_ucsmsdk'] else ''))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            found = regressions(report, json.load(baseline_file), args.tolerance, args.slack)
+        for line in found:
+            print('REGRESSION %s' % line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,565 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Stand-in UCS Manager XML API endpoint for tests.
+
+Serves the /nuova XML API over plain HTTP from an in-memory managed object
+tree so the ucs_ modules can be exercised without a live UCSM or the UCS
+Platform Emulator.  Method invocation counts, connections and request and
+response bytes are available as JSON from GET /stats (DELETE /stats resets
+them), PUT /settings takes a JSON object of timing settings to change (e.g.
+{"login_latency": 2}), PUT /faults takes a JSON object of XML API method to
+fault for the next response to that method ("cut" drops the connection after
+the first bytes of the response, "close" drops it after the response without
+announcing it) and the server can be stopped with POST /shutdown.
+
+    python test/ucsm_mock.py --port 8080
+    python test/ucsm_mock.py --port 8080 --model large --latency 0.05
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import itertools
+import json
+import queue
+import re
+import socket
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+DEFAULT_MOS = [
+    ('topSystem', dict(dn='sys', name='ucs-mock', address='127.0.0.1', mode='cluster')),
+    ('networkElement', dict(dn='sys/switch-A', id='A', oobIfIp='127.0.0.1')),
+    ('networkElement', dict(dn='sys/switch-B', id='B', oobIfIp='127.0.0.1')),
+    ('firmwareRunning', dict(dn='sys/mgmt/fw-system', deployment='system', version='4.0(4e)')),
+    ('orgOrg', dict(dn='org-root', name='root')),
+    ('fabricLanCloud', dict(dn='fabric/lan', mode='end-host')),
+    ('equipmentChassis', dict(dn='sys/chassis-1', id='1', model='UCSS-S3260')),
+] + [
+    ('storageLocalDisk', dict(dn='sys/chassis-1/enc-1/disk-%d' % disk, id=str(disk), diskState='unconfigured-good'))
+    for disk in range(1, 5)
+]
+
+
+# object counts of the generated domain models used by test/benchmark.py
+MODELS = dict(
+    small=dict(chassis=1, blades=2, racks=1, vlans=20, service_profiles=2, faults=2),
+    medium=dict(chassis=4, blades=8, racks=4, vlans=200, service_profiles=32, faults=4),
+    large=dict(chassis=20, blades=8, racks=16, vlans=2000, service_profiles=160, faults=8),
+)
+
+
+def domain_model(name):
+    """Return DEFAULT_MOS plus the objects of the named model in MODELS.
+
+    Generated chassis are numbered from 2 so the S3260 chassis-1 of
+    DEFAULT_MOS is kept.  The singleton policies UCSM always has (date and
+    time, QoS classes) are included so modules can modify them.  Each blade and rack server has local disks and
+    faults, VLANs get ids from 100 and service profiles are unassociated.
+    """
+    counts = MODELS[name]
+    mos = list(DEFAULT_MOS) + [
+        ('commSvcEp', dict(dn='sys/svc-ext')),
+        ('commDateTime', dict(dn='sys/svc-ext/datetime-svc', adminState='disabled', timezone='', descr='')),
+        ('qosclassDefinition', dict(dn='fabric/lan/classes')),
+    ] + [
+        ('qosclassEthClassified', dict(dn='fabric/lan/classes/class-%s' % priority, priority=priority, adminState='disabled',
+                                       cos=str(cos), weight='none', mtu='normal', drop='drop', multicastOptimize='no'))
+        for priority, cos in (('platinum', 5), ('gold', 4), ('silver', 2), ('bronze', 1))
+    ]
+    for chassis in range(2, counts['chassis'] + 2):
+        chassis_dn = 'sys/chassis-%d' % chassis
+        mos.append(('equipmentChassis', dict(dn=chassis_dn, id=str(chassis), model='UCSB-5108-AC2', operState='operable')))
+        for blade in range(1, counts['blades'] + 1):
+            blade_dn = '%s/blade-%d' % (chassis_dn, blade)
+            mos.append(('computeBlade', dict(dn=blade_dn, chassisId=str(chassis), slotId=str(blade), model='UCSB-B200-M5',
+                                             operState='ok', association='none', serial='FCH%04d%04d' % (chassis, blade))))
+            mos.extend(_server_children(blade_dn, 2, counts['faults']))
+    for rack in range(1, counts['racks'] + 1):
+        rack_dn = 'sys/rack-unit-%d' % rack
+        mos.append(('computeRackUnit', dict(dn=rack_dn, id=str(rack), model='UCSC-C240-M5SX', operState='ok', association='none')))
+        mos.extend(_server_children(rack_dn, 4, counts['faults']))
+    for vlan in range(100, counts['vlans'] + 100):
+        mos.append(('fabricVlan', dict(dn='fabric/lan/net-vlan%d' % vlan, id=str(vlan), name='vlan%d' % vlan,
+                                       sharing='none', defaultNet='no')))
+    for sp in range(1, counts['service_profiles'] + 1):
+        sp_dn = 'org-root/ls-sp-%d' % sp
+        mos.append(('lsServer', dict(dn=sp_dn, name='sp-%d' % sp, type='instance', assignState='unassigned',
+                                     assocState='unassociated', fsmStatus='nop')))
+        mos.append(('lsPower', dict(dn=sp_dn + '/power', state='up')))
+        for vnic in ('eth0', 'eth1'):
+            mos.append(('vnicEther', dict(dn='%s/ether-%s' % (sp_dn, vnic), name=vnic, switchId='A' if vnic == 'eth0' else 'B')))
+    return mos
+
+
+def _server_children(server_dn, disks, faults):
+    mos = []
+    for disk in range(1, disks + 1):
+        mos.append(('storageLocalDisk', dict(dn='%s/board/storage-SAS-1/disk-%d' % (server_dn, disk), id=str(disk),
+                                             diskState='unconfigured-good', size='953344')))
+    for fault in range(1, faults + 1):
+        mos.append(('faultInst', dict(dn='%s/fault-F%04d' % (server_dn, fault), code='F%04d' % fault, severity='minor',
+                                      descr='Mock fault %d' % fault)))
+    return mos
+
+
+class MoTree(object):
+    """Managed objects indexed by dn, with a parent to children index."""
+
+    def __init__(self, mos=DEFAULT_MOS):
+        self.lock = threading.RLock()
+        self.mos = {}
+        self.children = {}
+        for class_id, attrs in mos:
+            self.add(class_id, dict(attrs))
+
+    @staticmethod
+    def parent_dn(dn):
+        return dn.rsplit('/', 1)[0] if '/' in dn else ''
+
+    def add(self, class_id, attrs):
+        dn = attrs['dn']
+        if dn not in self.mos:
+            self.children.setdefault(self.parent_dn(dn), []).append(dn)
+        self.mos[dn] = (class_id, attrs)
+
+    def remove(self, dn):
+        if self.mos.pop(dn, None):
+            self.children[self.parent_dn(dn)].remove(dn)
+        for child_dn in list(self.children.get(dn, [])):
+            self.remove(child_dn)
+        self.children.pop(dn, None)
+
+    def by_class(self, class_id):
+        class_id = class_id.lower()
+        return [dn for dn, (mo_class, attrs) in self.mos.items() if mo_class.lower() == class_id]
+
+    def to_elem(self, dn, hierarchical=False):
+        class_id, attrs = self.mos[dn]
+        elem = ET.Element(class_id, attrs)
+        if hierarchical:
+            for child_dn in self.children.get(dn, []):
+                elem.append(self.to_elem(child_dn, True))
+        return elem
+
+
+def _match(flt, attrs):
+    """Evaluate an inFilter element (eq, ne, wcard, and, or, not, ...) against MO attributes."""
+    if flt.tag == 'and':
+        return all(_match(sub, attrs) for sub in flt)
+    if flt.tag == 'or':
+        return any(_match(sub, attrs) for sub in flt)
+    if flt.tag == 'not':
+        return not _match(flt[0], attrs)
+    value = attrs.get(flt.get('property'))
+    if value is None:
+        return False
+    if flt.tag == 'wcard':
+        return re.search(flt.get('value'), value) is not None
+    if flt.tag in ('gt', 'ge', 'lt', 'le'):
+        try:
+            left, right = float(value), float(flt.get('value'))
+        except ValueError:
+            left, right = value, flt.get('value')
+        return dict(gt=left > right, ge=left >= right, lt=left < right, le=left <= right)[flt.tag]
+    if flt.tag == 'ne':
+        return value != flt.get('value')
+    return value == flt.get('value')
+
+
+def _filtered(tree, dns, req):
+    in_filter = req.find('inFilter')
+    if in_filter is None or len(in_filter) == 0:
+        return dns
+    return [dn for dn in dns if _match(in_filter[0], tree.mos[dn][1])]
+
+
+def _response(req, **attrs):
+    rsp = ET.Element(req.tag, dict(cookie=req.get('cookie', ''), response='yes'))
+    rsp.attrib.update(attrs)
+    return rsp
+
+
+def _error(req, code, descr):
+    return _response(req, errorCode=str(code), invocationResult='unidentified-fail', errorDescr=descr)
+
+
+class MockUcsm(object):
+    """Dispatches XML API method elements against a MoTree.
+
+    latency seconds are added to every XML API request and connect_latency
+    seconds to every new connection, to stand in for a remote domain.
+
+    Operational state that UCSM changes in the background after a
+    configuration change (e.g., a disk's diskState after an adminAction or a
+    service profile's assocState after a binding) follows transition_delay
+    seconds after the commit.  Every change is published to eventSubscribe
+    channels as a configMoChangeEvent.
+    """
+
+    refresh_period = 600
+
+    def __init__(self, tree=None, transition_delay=0, latency=0, connect_latency=0):
+        self.tree = tree or MoTree()
+        self.transition_delay = transition_delay
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.login_latency = 0
+        self.faults = {}
+        self.subscribers = []
+        self.stats = Counter()
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._eids = itertools.count(1)
+
+    def subscribe(self):
+        channel = queue.Queue()
+        with self.tree.lock:
+            self.subscribers.append(channel)
+        return channel
+
+    def unsubscribe(self, channel):
+        with self.tree.lock:
+            self.subscribers.remove(channel)
+
+    def _publish(self, class_id, attrs, status):
+        if not self.subscribers:
+            return
+        event = ET.Element('methodVessel')
+        stimuli = ET.SubElement(event, 'inStimuli')
+        change = ET.SubElement(stimuli, 'configMoChangeEvent', inEid=str(next(self._eids)))
+        config = ET.SubElement(change, 'inConfig')
+        ET.SubElement(config, class_id, attrs, status=status)
+        for channel in self.subscribers:
+            channel.put(ET.tostring(event))
+
+    def _set(self, dn, attrs):
+        with self.tree.lock:
+            if dn in self.tree.mos:
+                self.tree.mos[dn][1].update(attrs)
+                self._publish(self.tree.mos[dn][0], dict(attrs, dn=dn), 'modified')
+
+    def _transition(self, dn, attrs, steps=1):
+        timer = threading.Timer(self.transition_delay * steps, self._set, (dn, attrs))
+        timer.daemon = True
+        timer.start()
+
+    def _associate(self, ls_dn, associate):
+        if associate:
+            self._set(ls_dn, dict(assignState='assigned', assocState='associating', fsmStatus='AssociateBegin', fsmProgr='0'))
+            self._transition(ls_dn, dict(fsmStatus='AssociateConfigSoL', fsmStageDescr='Configuring SoL interface on server', fsmProgr='50'))
+            self._transition(ls_dn, dict(assocState='associated', fsmStatus='nop', fsmStageDescr='', fsmProgr='100'), 2)
+        else:
+            self._set(ls_dn, dict(assocState='disassociating', fsmStatus='DisassociateBegin', fsmProgr='0'))
+            self._transition(ls_dn, dict(assignState='unassigned', assocState='unassociated', fsmStatus='nop', fsmProgr='100'))
+
+    def handle(self, req):
+        self.stats[req.tag] += 1
+        method = getattr(self, 'm_' + req.tag, None)
+        if method is None:
+            return _error(req, 1, 'unsupported method %s' % req.tag)
+        if not req.tag.startswith('aaa') and req.get('cookie') not in self.sessions:
+            return _error(req, 552, 'Authorization required')
+        if req.tag == 'aaaLogin':
+            time.sleep(self.login_latency)
+        with self.tree.lock:
+            return method(req)
+
+    def _new_cookie(self, name):
+        cookie = '%d/mock-%d' % (int(1e9) + next(self._ids), next(self._ids))
+        self.sessions[cookie] = name
+        return cookie
+
+    def m_aaaLogin(self, req):
+        return _response(
+            req,
+            outCookie=self._new_cookie(req.get('inName')),
+            outRefreshPeriod=str(self.refresh_period),
+            outPriv='admin,read-only',
+            outDomains='',
+            outChannel='noencssl',
+            outEvtChannel='noencssl',
+            outSessionId='',
+            outVersion='4.0(4e)',
+            outName=req.get('inName'),
+        )
+
+    def m_aaaRefresh(self, req):
+        name = self.sessions.pop(req.get('inCookie'), None)
+        if name is None:
+            return _error(req, 552, 'Authorization required')
+        return _response(
+            req,
+            outCookie=self._new_cookie(name),
+            outRefreshPeriod=str(self.refresh_period),
+            outPriv='admin,read-only',
+            outDomains='',
+            outChannel='noencssl',
+            outEvtChannel='noencssl',
+        )
+
+    def m_aaaLogout(self, req):
+        self.sessions.pop(req.get('inCookie'), None)
+        return _response(req, outStatus='success')
+
+    def m_configResolveDn(self, req):
+        rsp = _response(req, dn=req.get('dn'))
+        out = ET.SubElement(rsp, 'outConfig')
+        if req.get('dn') in self.tree.mos:
+            out.append(self.tree.to_elem(req.get('dn'), req.get('inHierarchical') == 'true'))
+        return rsp
+
+    def m_configResolveDns(self, req):
+        rsp = _response(req)
+        out = ET.SubElement(rsp, 'outConfigs')
+        unresolved = ET.SubElement(rsp, 'outUnresolved')
+        for dn_elem in req.iter('dn'):
+            dn = dn_elem.get('value')
+            if dn in self.tree.mos:
+                out.append(self.tree.to_elem(dn, req.get('inHierarchical') == 'true'))
+            else:
+                ET.SubElement(unresolved, 'dn', value=dn)
+        return rsp
+
+    def m_configResolveClass(self, req):
+        rsp = _response(req, classId=req.get('classId'))
+        out = ET.SubElement(rsp, 'outConfigs')
+        for dn in _filtered(self.tree, self.tree.by_class(req.get('classId')), req):
+            out.append(self.tree.to_elem(dn, req.get('inHierarchical') == 'true'))
+        return rsp
+
+    def m_configResolveClasses(self, req):
+        rsp = _response(req)
+        out = ET.SubElement(rsp, 'outConfigs')
+        for class_elem in req.iter('classId'):
+            for dn in self.tree.by_class(class_elem.get('value')):
+                out.append(self.tree.to_elem(dn, req.get('inHierarchical') == 'true'))
+        return rsp
+
+    def m_configResolveChildren(self, req):
+        rsp = _response(req, classId=req.get('classId', ''), inDn=req.get('inDn'))
+        out = ET.SubElement(rsp, 'outConfigs')
+        class_id = req.get('classId', '').lower()
+        for dn in _filtered(self.tree, self.tree.children.get(req.get('inDn'), []), req):
+            if not class_id or self.tree.mos[dn][0].lower() == class_id:
+                out.append(self.tree.to_elem(dn, req.get('inHierarchical') == 'true'))
+        return rsp
+
+    def _conf_mo(self, elem):
+        dn = elem.get('dn')
+        status = elem.get('status', '')
+        attrs = dict((k, v) for k, v in elem.attrib.items() if k not in ('status', 'rn'))
+        if elem.tag == 'lsPower' and attrs.get('state', '').startswith('admin-'):
+            # UCSM reports the resulting power state, not the requested admin action
+            attrs['state'] = attrs['state'][len('admin-'):]
+        if elem.tag == 'storageLocalDisk' and attrs.get('adminActionTrigger') == 'triggered':
+            attrs['adminActionTrigger'] = 'idle'
+            self._transition(dn, dict(diskState=attrs['adminAction']))
+        if elem.tag == 'lsVConAssign':
+            # UCSM applies the placement to the vNIC (or vHBA) itself
+            vnic_dn = '%s/%s-%s' % (self.tree.parent_dn(dn), 'ether' if attrs.get('transport') == 'ethernet' else 'fc',
+                                    attrs.get('vnicName'))
+            self._set(vnic_dn, dict(adminVcon=attrs.get('adminVcon'), order=attrs.get('order')))
+        if 'deleted' in status:
+            if dn in self.tree.mos:
+                self._publish(self.tree.mos[dn][0], dict(dn=dn), 'deleted')
+            self.tree.remove(dn)
+            if elem.tag in ('lsBinding', 'lsRequirement'):
+                self._associate(self.tree.parent_dn(dn), False)
+            return
+        if dn in self.tree.mos:
+            if status == 'created':
+                raise ValueError(103, 'Object %s already exists' % dn)
+            self.tree.mos[dn][1].update(attrs)
+            self._publish(elem.tag, attrs, 'modified')
+        elif 'created' in status or not status:
+            self.tree.add(elem.tag, attrs)
+            self._publish(elem.tag, attrs, 'created')
+        else:
+            raise ValueError(102, 'Object %s does not exist' % dn)
+        if elem.tag in ('lsBinding', 'lsRequirement') and self.tree.parent_dn(dn) in self.tree.mos:
+            self._associate(self.tree.parent_dn(dn), True)
+        for child in elem:
+            self._conf_mo(child)
+
+    def m_configConfMos(self, req):
+        rsp = _response(req)
+        out = ET.SubElement(rsp, 'outConfigs')
+        try:
+            for pair in req.find('inConfigs'):
+                for elem in pair:
+                    self._conf_mo(elem)
+                    out_pair = ET.SubElement(out, 'pair', key=pair.get('key'))
+                    if elem.get('dn') in self.tree.mos:
+                        out_pair.append(self.tree.to_elem(elem.get('dn'), True))
+                    else:
+                        out_pair.append(ET.Element(elem.tag, dict(dn=elem.get('dn'), status='deleted')))
+        except ValueError as e:
+            return _error(req, e.args[0], e.args[1])
+        return rsp
+
+    def _copy(self, src_dn, dst_dn, **attrs):
+        class_id, src_attrs = self.tree.mos[src_dn]
+        new_attrs = dict(src_attrs, dn=dst_dn, **attrs)
+        self.tree.add(class_id, new_attrs)
+        self._publish(class_id, new_attrs, 'created')
+        for child_dn in list(self.tree.children.get(src_dn, [])):
+            self._copy(child_dn, dst_dn + child_dn[len(src_dn):])
+
+    def m_lsInstantiateNNamedTemplate(self, req):
+        templ_dn = req.get('dn')
+        if templ_dn not in self.tree.mos:
+            return _error(req, 102, 'Template %s does not exist' % templ_dn)
+        org_dn = req.get('inTargetOrg') or self.tree.parent_dn(templ_dn)
+        name_set = req.find('inNameSet')
+        names = [dn.get('value') for dn in (name_set if name_set is not None else [])]
+        existing = [name for name in names if '%s/ls-%s' % (org_dn, name) in self.tree.mos]
+        if existing and req.get('inErrorOnExisting') == 'true':
+            return _error(req, 103, 'Object %s/ls-%s already exists' % (org_dn, existing[0]))
+        rsp = _response(req)
+        out = ET.SubElement(rsp, 'outConfigs')
+        for name in names:
+            if name in existing:
+                continue
+            ls_dn = '%s/ls-%s' % (org_dn, name)
+            self._copy(templ_dn, ls_dn, name=name, type='instance', srcTemplName=self.tree.mos[templ_dn][1].get('name', ''))
+            out.append(self.tree.to_elem(ls_dn, req.get('inHierarchical') == 'true'))
+        return rsp
+
+
+class MockUcsmHandler(BaseHTTPRequestHandler):
+    # keep connections open between requests like UCSM does
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.ucsm.stats['connections'] += 1
+        time.sleep(self.server.ucsm.connect_latency)
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send(json.dumps(self.server.ucsm.stats).encode(), 'application/json')
+        else:
+            self.send_error(404)
+
+    def _event_channel(self, req):
+        """Stream change events as <length>\n<xml> records until the client goes away."""
+        ucsm = self.server.ucsm
+        ucsm.stats[req.tag] += 1
+        if req.get('cookie') not in ucsm.sessions:
+            self._send(ET.tostring(_error(req, 552, 'Authorization required')), 'text/xml')
+            return
+        channel = ucsm.subscribe()
+        try:
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            while True:
+                try:
+                    event = channel.get(timeout=1)
+                except queue.Empty:
+                    continue
+                self.wfile.write(b'%d\n' % len(event) + event)
+                self.wfile.flush()
+        except (IOError, OSError):
+            pass
+        finally:
+            ucsm.unsubscribe(channel)
+
+    def do_DELETE(self):
+        if self.path == '/stats':
+            self.server.ucsm.stats.clear()
+            self._send(b'{}', 'application/json')
+        else:
+            self.send_error(404)
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/settings':
+            ucsm = self.server.ucsm
+            for name, value in json.loads(body).items():
+                if name not in ('transition_delay', 'latency', 'connect_latency', 'login_latency'):
+                    self.send_error(400, 'unknown setting %s' % name)
+                    return
+                setattr(ucsm, name, float(value))
+            self._send(b'{}', 'application/json')
+        elif self.path == '/faults':
+            self.server.ucsm.faults.update(json.loads(body))
+            self._send(b'{}', 'application/json')
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/shutdown':
+            self._send(b'{}', 'application/json')
+            threading.Thread(target=self.server.shutdown).start()
+        elif self.path == '/nuova':
+            req = ET.fromstring(body)
+            if req.tag == 'eventSubscribe':
+                self._event_channel(req)
+                return
+            rsp = ET.tostring(self.server.ucsm.handle(req))
+            time.sleep(self.server.ucsm.latency)
+            self.server.ucsm.stats['bytes_in'] += len(body)
+            self.server.ucsm.stats['bytes_out'] += len(rsp)
+            fault = self.server.ucsm.faults.pop(req.tag, None)
+            if fault == 'cut':
+                # drop the connection partway through the status line
+                self.wfile.write(b'HTTP/1.1')
+                self.wfile.flush()
+                self.connection.shutdown(socket.SHUT_RDWR)
+                self.close_connection = True
+                return
+            self._send(rsp, 'text/xml')
+            if fault == 'close':
+                self.close_connection = True
+        else:
+            self.send_error(404)
+
+
+class MockUcsmServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, ucsm=None):
+        HTTPServer.__init__(self, address, MockUcsmHandler)
+        self.ucsm = ucsm or MockUcsm()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--transition-delay', type=float, default=0,
+                        help='seconds before operational state follows a configuration change')
+    parser.add_argument('--model', choices=sorted(MODELS), help='serve a generated domain model instead of the default objects')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every XML API request')
+    parser.add_argument('--connect-latency', type=float, default=0, help='seconds added to every new connection')
+    args = parser.parse_args()
+    tree = MoTree(domain_model(args.model)) if args.model else None
+    ucsm = MockUcsm(tree, transition_delay=args.transition_delay, latency=args.latency, connect_latency=args.connect_latency)
+    MockUcsmServer((args.host, args.port), ucsm).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
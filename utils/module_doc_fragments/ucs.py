@@ -35,6 +35,9 @@ class ModuleDocFragment(object):
     DOCUMENTATION = '''
 notes:
   - Examples can be used with the L(UCS Platform Emulator, https://cs.co/ucspe).
+  - Results include C(ucs_perf), a summary of the XML API calls the task made. It has the round trips, logins, retries,
+    time waited and request and response bytes, totals for each method, the slowest calls, and the connection counts
+    when I(keep_alive=yes).
 options:
   hostname:
     description:
@@ -70,4 +73,36 @@ options:
     - If use_proxy is no, specfies proxy to be used for connection.
       e.g. 'http://proxy.xy.z:8080'
     type: str
+  session_cache:
+    description:
+    - If C(yes), the UCS Manager session cookie is stored in I(session_cache_path) and reused by later tasks for the same
+      hostname, username, port, scheme (I(use_ssl)) and proxy instead of logging in and out on every task.
+    - A cached cookie is renewed with aaaRefresh on reuse and a new login is only done once it has expired.
+    type: bool
+    default: no
+  session_cache_path:
+    description:
+    - File used to store cached UCS Manager sessions when I(session_cache=yes).
+    - Passwords are not written to this file, but session cookies are, so it is created readable by the owner only.
+    type: path
+    default: ~/.ansible/ucs_session_cache.json
+  session_cache_ttl:
+    description:
+    - Number of seconds a cached session is reused before a new login is done.
+    - Should be less than the UCS Manager session refresh period (600 seconds by default).
+    type: int
+    default: 540
+  keep_alive:
+    description:
+    - If C(yes), requests to Cisco UCS Manager in a task share one persistent connection, and TLS sessions are resumed
+      when a connection has to be reopened, instead of a new connection and TLS handshake per request.
+    - Not used when requests go through a proxy.
+    type: bool
+    default: no
+  perf_trace_path:
+    description:
+    - If set, every XML API call is appended to this file as a line of JSON with the method, target dn or class,
+      latency, request and response bytes and retries, for finding where time is spent across many tasks.
+    - Tasks running in parallel can share the file, each line is written with a single append.
+    type: path
 '''